@@ -0,0 +1,144 @@
+import glob
+import time
+import numpy as np
+from pyproj import Geod
+
+from peak_analysis import (
+    ACCURACY_TIERS,
+    calculate_dominance_distance,
+    calculate_dominance_metric,
+    calculate_prominent_peaks,
+    find_local_maxima,
+    set_image_borders_to_zero,
+)
+from geo_utils import RowScaleTable
+from reader import read_dem
+
+
+def compare_to_exact(exact_peaks, approx_peaks):
+    """
+    Vergleicht das Ergebnis einer Genauigkeitsstufe mit dem exakten Ergebnis.
+    Gipfel werden über ihre Pixelkoordinaten zugeordnet.
+    :param exact_peaks: Liste [((x, y), Höhe, Prominenz), ...] der exakten Berechnung
+    :param approx_peaks: Liste im selben Format aus der genäherten Berechnung
+    :return: Dictionary mit precision, recall, mittlerem und maximalem Prominenzfehler (m)
+    """
+    exact = {tuple(map(int, xy)): prom for xy, _, prom in exact_peaks}
+    approx = {tuple(map(int, xy)): prom for xy, _, prom in approx_peaks}
+    matched = exact.keys() & approx.keys()
+
+    precision = len(matched) / len(approx) if approx else 1.0
+    recall = len(matched) / len(exact) if exact else 1.0
+    errors = np.array([approx[xy] - exact[xy] for xy in matched], dtype=np.float64)
+    return {
+        "precision": precision,
+        "recall": recall,
+        "mean_abs_error": float(np.mean(np.abs(errors))) if errors.size else 0.0,
+        "max_abs_error": float(np.max(np.abs(errors))) if errors.size else 0.0,
+        "peaks": len(approx),
+    }
+
+
+def validate_accuracy_tiers(dem_paths, prominence_threshold=100, border_width=50):
+    """
+    Misst für jede Genauigkeitsstufe Laufzeit, Precision/Recall der gefundenen Gipfel
+    und Prominenzfehler gegenüber der exakten Berechnung.
+    :param dem_paths: Liste von GeoTIFF-Pfaden
+    :param prominence_threshold: Prominenz-Schwelle (m) für die Gipfelauswahl
+    :param border_width: Breite des Randes, der ausgeschlossen wird
+    :return: Liste von Dictionaries je (DEM, Stufe)
+    """
+    tier_options = {
+        "line": {"use_dijkstra": False},
+        "bounded": {"bounded_search": True},
+        "exact": {},
+    }
+    results = []
+    for dem_path in dem_paths:
+        dem = read_dem(dem_path)[0]
+        candidates = [(c, r) for r, c in find_local_maxima(dem, border_width)]
+
+        tier_peaks = {}
+        tier_times = {}
+        for tier in ("exact", "bounded", "line"):
+            start_time = time.time()
+            tier_peaks[tier] = calculate_prominent_peaks(candidates, dem, prominence_threshold, **tier_options[tier])
+            tier_times[tier] = time.time() - start_time
+
+        for tier in ACCURACY_TIERS:
+            stats = compare_to_exact(tier_peaks["exact"], tier_peaks[tier])
+            stats.update({"dem": dem_path, "tier": tier, "seconds": tier_times[tier]})
+            results.append(stats)
+    return results
+
+
+def validate_metric_dominance(dem_path, samples=30, border_width=50, seed=0):
+    """
+    Prüft die Dominanz in Metern (calculate_dominance_metric) gegen eine geodätische Referenz:
+    für Stichproben-Gipfel der Abstand per pyproj.Geod zu allen Pixeln mit Höhe >= Gipfelhöhe, davon das Minimum.
+    Zum Vergleich wird auch die bisherige Umrechnung Pixel-Dominanz / Pixel pro Meter (y, linke obere Ecke) gemessen.
+    :param dem_path: Pfad zur GeoTIFF-Datei
+    :param samples: Anzahl zufälliger Gipfelkandidaten; die höchsten Kandidaten (große Dominanz) kommen immer hinzu
+    :return: Dictionary mit maximalem relativen Fehler und Laufzeiten beider Verfahren
+    """
+    dem, crs, transform, _ = read_dem(dem_path)
+    dem = set_image_borders_to_zero(dem, width=border_width)
+    row_scales = RowScaleTable.from_transform(crs, transform, dem.shape[0])
+    geod = Geod(ellps="WGS84")
+
+    candidates = find_local_maxima(dem.copy(), border_width)
+    heights = dem[candidates[:, 0], candidates[:, 1]]
+    rng = np.random.default_rng(seed)
+    picked = set(rng.choice(len(candidates), min(samples, len(candidates)), replace=False).tolist())
+    picked |= set(np.argsort(-heights)[1:6].tolist())  # höchster Kandidat hat keine Dominanz
+
+    rows, cols = np.indices(dem.shape)
+    lons = transform.c + (cols + 0.5) * transform.a
+    lats = transform.f + (rows + 0.5) * transform.e
+    meters_y = row_scales.northing[1] - row_scales.northing[0]  # bisher: Maßstab der obersten Zeile für beide Achsen
+
+    metric_errors, pixel_errors = [], []
+    metric_seconds = pixel_seconds = 0.0
+    for i in sorted(picked):
+        y, x = candidates[i]
+        higher = dem >= dem[y, x]
+        higher[y, x] = False
+        if not higher.any():
+            continue
+        n = np.count_nonzero(higher)
+        _, _, dist = geod.inv(np.full(n, lons[y, x]), np.full(n, lats[y, x]), lons[higher], lats[higher])
+        reference = dist.min()
+
+        start_time = time.time()
+        metric = calculate_dominance_metric((x, y), dem, row_scales)
+        metric_seconds += time.time() - start_time
+        start_time = time.time()
+        pixel = calculate_dominance_distance((x, y), dem) * meters_y
+        pixel_seconds += time.time() - start_time
+
+        metric_errors.append(abs(metric - reference) / reference)
+        pixel_errors.append(abs(pixel - reference) / reference)
+
+    return {
+        "dem": dem_path,
+        "peaks": len(metric_errors),
+        "metric_max_rel_error": float(np.max(metric_errors)) if metric_errors else 0.0,
+        "pixel_max_rel_error": float(np.max(pixel_errors)) if pixel_errors else 0.0,
+        "metric_seconds": metric_seconds,
+        "pixel_seconds": pixel_seconds,
+    }
+
+
+if __name__ == "__main__":
+    rows = validate_accuracy_tiers(sorted(glob.glob("images/*.tif")), prominence_threshold=100)
+
+    print(f"\n{'DEM':<28} {'Stufe':<8} {'Zeit [s]':>9} {'Gipfel':>7} {'Precision':>10} {'Recall':>7} {'MAE [m]':>8} {'Max [m]':>8}")
+    for row in rows:
+        print(f"{row['dem']:<28} {row['tier']:<8} {row['seconds']:>9.2f} {row['peaks']:>7} "
+              f"{row['precision']:>10.3f} {row['recall']:>7.3f} {row['mean_abs_error']:>8.1f} {row['max_abs_error']:>8.1f}")
+
+    print(f"\n{'DEM':<28} {'Gipfel':>7} {'Fehler Meter':>13} {'Fehler Pixel':>13} {'Zeit Meter [s]':>15} {'Zeit Pixel [s]':>15}")
+    for dem_path in sorted(glob.glob("images/*.tif")):
+        row = validate_metric_dominance(dem_path)
+        print(f"{row['dem']:<28} {row['peaks']:>7} {row['metric_max_rel_error']:>13.2e} {row['pixel_max_rel_error']:>13.2e} "
+              f"{row['metric_seconds']:>15.2f} {row['pixel_seconds']:>15.2f}")
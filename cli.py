@@ -0,0 +1,130 @@
+import argparse
+import contextlib
+import csv
+import sys
+import numpy as np
+import rasterio
+import rasterio.transform
+
+from peak_analysis import ACCURACY_TIERS, find_peaks, neighbourhood_size
+from roi_analysis import find_peaks_in_roi
+from geo_utils import RowScaleTable, calculate_pixels_per_meter, convert_coordinates_to_wgs84
+from reader import read_dem
+from tile_store import CODECS, CompressedTileStore
+
+
+def _parse_roi(text):
+    values = [float(v) for v in text.split(",")]
+    if len(values) != 4:
+        raise argparse.ArgumentTypeError("ROI muss als x0,y0,x1,y1 angegeben werden")
+    return tuple(values)
+
+
+def _parse_polygon(text):
+    try:
+        vertices = [tuple(float(v) for v in point.split(",")) for point in text.split(";") if point.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("Polygon muss als x,y;x,y;... angegeben werden")
+    if len(vertices) < 3 or any(len(p) != 2 for p in vertices):
+        raise argparse.ArgumentTypeError("Polygon braucht mindestens 3 Punkte der Form x,y")
+    return vertices
+
+
+def build_parser():
+    """Erstellt den Argument-Parser der Kommandozeile."""
+    parser = argparse.ArgumentParser(description="PeakFinder: prominente Gipfel in einem GeoTIFF-DEM finden")
+    parser.add_argument("dem", help="Pfad zur GeoTIFF-Datei")
+    parser.add_argument("--prominence", type=float, default=500, help="Mindestprominenz in m (Standard: 500)")
+    parser.add_argument("--dominance", type=float, default=2000, help="Mindestdominanz in m (Standard: 2000; in Pixeln, falls keine Meter-Umrechnung möglich ist)")
+    parser.add_argument("--orographic", type=float, default=0, help="Mindest-Orographische Dominanz in %% (Standard: 0)")
+    parser.add_argument("--min-height", type=float, default=0, help="Mindesthöhe in m (Standard: 0)")
+    parser.add_argument("--border", type=int, default=50, help="Randbreite in Pixeln (Standard: 50)")
+    parser.add_argument("--accuracy", choices=list(ACCURACY_TIERS), default="exact",
+                        help="Genauigkeitsstufe der Prominenz: " +
+                             "; ".join(f"{k} = {v}" for k, v in ACCURACY_TIERS.items()))
+    parser.add_argument("--neighbourhood", type=float,
+                        help="Umgebungsradius der lokalen Maxima in m (Standard: 7x7 Pixel)")
+    parser.add_argument("--roi", type=_parse_roi, help="Nur Gipfel im Rechteck x0,y0,x1,y1 (Pixel); liest nur die nötigen Fenster")
+    parser.add_argument("--roi-polygon", type=_parse_polygon, help="Nur Gipfel im Polygon x,y;x,y;... (Pixel)")
+    parser.add_argument("--tile-store", choices=list(CODECS),
+                        help="DEM komprimiert in Kacheln halten und blockweise analysieren (spart Speicher bei großen DEMs)")
+    parser.add_argument("--cache-tiles", type=int, default=64, help="Anzahl entpackter Kacheln im Cache (Standard: 64)")
+    parser.add_argument("-o", "--output", help="CSV-Ausgabedatei (Standard: Ausgabe auf stdout)")
+    return parser
+
+
+def _run_analysis(args, crs, transform, resolution, n_rows):
+    """
+    Führt find_peaks bzw. find_peaks_in_roi aus. Die Dominanz wird über die Zeilentabellen in Metern
+    berechnet; nur wenn das nicht möglich ist, in Pixeln.
+    :return: (Gipfelliste, Einheit der Dominanz "m" oder "px")
+    """
+    try:
+        pixel_per_meter = calculate_pixels_per_meter(crs, resolution, transform.c, transform.f)
+        row_scales = RowScaleTable.from_transform(crs, transform, n_rows)
+    except Exception as e:
+        print(f"Fehler Meter↔Pixel: {e}. Dominanz wird in Pixeln verwendet.")
+        pixel_per_meter = None
+        row_scales = None
+
+    size = 7
+    if args.neighbourhood:
+        if pixel_per_meter is None:
+            print("Pixel pro Meter unbekannt: Umgebungsradius wird in Pixeln verwendet.")
+        size = neighbourhood_size(args.neighbourhood, pixel_per_meter or (1, 1))
+        print(f"Umgebungsradius {args.neighbourhood} m ≙ Fenster {size[1]}x{size[0]} px")
+
+    options = dict(
+        prominence_threshold_val=args.prominence,
+        dominance_threshold_val=args.dominance,
+        orographic_dominence_threshold_val=args.orographic,
+        border_width=args.border,
+        min_height=args.min_height,
+        accuracy=args.accuracy,
+        neighbourhood_size=size,
+        row_scales=row_scales,
+    )
+    roi = args.roi or args.roi_polygon
+    source = args.dem
+    if args.tile_store:
+        source = CompressedTileStore.from_file(args.dem, codec=args.tile_store, cache_tiles=args.cache_tiles)
+    if roi is not None:
+        peaks = find_peaks_in_roi(source, roi, **options)
+    elif args.tile_store:
+        peaks = find_peaks(source, **options)
+    else:
+        peaks = find_peaks(read_dem(args.dem)[0], **options)
+    if args.tile_store:
+        source.print_metrics()
+
+    return peaks, "m" if row_scales is not None else "px"
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    with rasterio.open(args.dem) as src:
+        crs, transform, (xres, yres), n_rows = src.crs, src.transform, src.res, src.height
+    # Fortschrittsmeldungen der Analyse nach stderr, damit stdout reines CSV bleibt
+    with contextlib.redirect_stdout(sys.stderr):
+        peaks, dominance_unit = _run_analysis(args, crs, transform, (xres, yres), n_rows)
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["Nr.", "Pixel-Koord", "Breitengrad", "Längengrad", "Höhe (m)", "Prominenz (m)", f"Dominanz ({dominance_unit})"])
+        if peaks:
+            xs = np.array([xy[0] for xy, _, _, _ in peaks])
+            ys = np.array([xy[1] for xy, _, _, _ in peaks])
+            world_x, world_y = rasterio.transform.xy(transform, ys, xs)
+            longs, lats = convert_coordinates_to_wgs84(np.asarray(world_x), np.asarray(world_y), crs)
+            for idx, ((x, y), h, prom, dom) in enumerate(peaks, start=1):
+                writer.writerow([idx, f"{x}, {y}", f"{lats[idx - 1]:.8f}", f"{longs[idx - 1]:.8f}", h, prom, f"{dom:.2f}"])
+    finally:
+        if args.output:
+            out.close()
+    print(f"{len(peaks)} Gipfel gefunden (Genauigkeit: {args.accuracy})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import numpy as np
 from pyproj import CRS, Transformer, Geod
 
 def convert_coordinates_to_wgs84(x, y, crs_system):
@@ -21,13 +22,12 @@ def calculate_pixels_per_meter(crs_system, pixel_scale, top_left_x, top_left_y):
     :return: Pixel pro Meter (x, y)
     """
     crs = CRS.from_user_input(crs_system)
+    pixel_scale_x = pixel_scale[0]
+    pixel_scale_y = pixel_scale[1]
 
     if crs.is_geographic: # Einheit ist Grad -> umrechnen über Geodäsie
         geod = Geod(ellps="WGS84")
 
-        pixel_scale_x = pixel_scale[0]
-        pixel_scale_y = pixel_scale[1]
-
         # Horizontal: 1 Pixel = pixel_scale_x Grad in Längengrad
         lon1 = top_left_x
         lon2 = top_left_x + pixel_scale_x
@@ -54,6 +54,64 @@ def calculate_pixels_per_meter(crs_system, pixel_scale, top_left_x, top_left_y):
     print(f"Auflösung [m]: {dist_x} x {dist_y}")
     return px_per_meter_x, px_per_meter_y
 
+class RowScaleTable:
+    """
+    Meter je Pixel für jede Zeile eines DEMs. Bei geographischen DEMs hängt der Ost-West-Abstand
+    eines Pixels von der Breite ab; er wird einmal je Zeile geodätisch berechnet, ebenso die
+    Nord-Süd-Position jeder Zeile. Damit lassen sich Abstände zwischen Pixeln in Metern vektorisiert
+    bestimmen, ohne für jedes Pixelpaar Geod.inv aufzurufen.
+    """
+
+    def __init__(self, meters_x, northing):
+        self.meters_x = np.asarray(meters_x, dtype=np.float64)  # Ost-West-Meter je Pixel in Zeile r
+        self.northing = np.asarray(northing, dtype=np.float64)  # Abstand der Zeile r zur Zeile 0 in m (steigend)
+
+    @classmethod
+    def from_transform(cls, crs_system, transform, n_rows):
+        """
+        Erzeugt die Tabellen aus CRS und Affine-Transform des DEMs (Pixelmitten).
+        :param n_rows: Anzahl Zeilen des DEMs
+        """
+        crs = CRS.from_user_input(crs_system)
+        rows = np.arange(n_rows, dtype=np.float64)
+        if crs.is_geographic:
+            geod = Geod(ellps="WGS84")
+            lats = transform.f + (rows + 0.5) * transform.e
+            lon = np.full(n_rows, transform.c)
+            _, _, meters_x = geod.inv(lon, lats, lon + transform.a, lats)
+            _, _, steps = geod.inv(lon[:-1], lats[:-1], lon[1:], lats[1:])
+            northing = np.concatenate([[0.0], np.cumsum(steps)])
+        elif crs.is_projected:
+            meters_x = np.full(n_rows, abs(transform.a))
+            northing = rows * abs(transform.e)
+        else:
+            raise ValueError("Unbekannter CRS-Typ – weder geographisch noch projiziert")
+        return cls(meters_x, northing)
+
+    def distances(self, x, y, xs, ys):
+        """
+        Abstände in Metern vom Pixel (x, y) zu den Pixeln (xs, ys).
+        Nord-Süd exakt über die Zeilentabelle, Ost-West mit dem Maßstab der mittleren Zeile.
+        """
+        ys = np.asarray(ys)
+        dy = self.northing[ys] - self.northing[y]
+        dx = (np.asarray(xs) - x) * self.meters_x[(ys + y) // 2]
+        return np.hypot(dx, dy)
+
+    def pixel_extent(self, y, distance):
+        """
+        Halbe Ausdehnung (x, y) in Pixeln eines Kreises mit Radius distance (m) um Zeile y.
+        Konservativ, d.h. der Kreis liegt vollständig im Rechteck.
+        """
+        n = len(self.northing)
+        top = np.searchsorted(self.northing, self.northing[y] - distance, side="left")
+        bottom = np.searchsorted(self.northing, self.northing[y] + distance, side="right") - 1
+        ry = max(y - top, bottom - y) + 1
+        rows = slice(max(0, y - ry), min(n, y + ry + 1))
+        rx = int(np.ceil(distance / self.meters_x[rows].min())) + 1
+        return rx, ry
+
+
 if __name__ == "__main__":
     print("--- Test für convert_coordinates_to_wgs84 ---")
     x, y = 500000, 4649776  # Beispielkoordinaten in UTM Zone 33N
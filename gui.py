@@ -3,13 +3,15 @@ from tkinter import filedialog, Toplevel, ttk
 import rasterio.transform
 import matplotlib
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image, ImageTk
 import numpy as np
 import csv 
 
-from peak_analysis import find_peaks
-from geo_utils import calculate_pixels_per_meter, convert_coordinates_to_wgs84
+from peak_analysis import ACCURACY_TIERS, find_peaks, neighbourhood_size, SaddleCache
+from peak_table import VirtualPeakTable
+from plot_renderer import DemPlotRenderer
+from roi_analysis import find_peaks_in_roi
+from geo_utils import RowScaleTable, calculate_pixels_per_meter, convert_coordinates_to_wgs84
 from reader import read_dem
 
 # --- Matplotlib Einstellungen ---
@@ -28,20 +30,24 @@ class PeakFinderApp:
         self._set_icon() # Icon Setzen
 
         # --- Instanz Variablen ---
-        self.canvas = None # Canvas-Referenz für draw()
-        self.canvas_widget = None
-        self.canvas_figure = None
+        self.plot = None # DemPlotRenderer, wird beim ersten Laden angelegt
         self.dem_data = None
+        self.saddle_cache = SaddleCache() # Sattelhöhen für wiederholte Suchen auf demselben DEM
         self.peaks_table = None
-        self.peaks_csv = []
         self.pixel_per_meter = None
+        self.row_scales = None     # RowScaleTable: Meter je Pixel pro Zeile für die Dominanz in Metern
+        self.dominance_unit = "m"  # Einheit der Dominanz im letzten Ergebnis ("px" ohne row_scales)
         self.geo_transform = None
+        self.file_path = None
+        self.roi = None            # ROI (x0, y0, x1, y1) in Pixeln, per Rubber-Band im 2D-Plot gewählt
         self.crs_system = None
         self.prominence_threshold = 500  # Default Wert (Himalaya-Modus)
         self.dominance_threshold = 2000  # Default Wert (Himalaya-Modus)
         self.orographic_threshold = 0  # Default Orographische Dominanz in %
         self.min_height_threshold = 0    # Default wert
         self.border_width = 50
+        self.accuracy = "exact"          # Genauigkeitsstufe der Prominenz (siehe ACCURACY_TIERS)
+        self.neighbourhood_m = None      # Umgebungsradius der lokalen Maxima in m (None = 7x7 Pixel)
 
          # --- Setup UI ---
         self._create_frames()
@@ -67,8 +73,9 @@ class PeakFinderApp:
         self.right_frame_top = ctk.CTkFrame(self.root, corner_radius=10)
         self.right_frame_top.pack(side="right", expand=True, fill="both", padx=10, pady=10)
 
-        self.right_frame_bottom = ctk.CTkScrollableFrame(self.right_frame_top, height=150, corner_radius=10)
+        self.right_frame_bottom = ctk.CTkFrame(self.right_frame_top, height=200, corner_radius=10)
         self.right_frame_bottom.pack(side="bottom", fill="x", padx=10, pady=10)
+        self.right_frame_bottom.pack_propagate(False)
 
 
     def _create_left_widgets(self):
@@ -84,8 +91,12 @@ class PeakFinderApp:
         find_peaks_button = ctk.CTkButton(self.left_frame, text="Gipfel finden", fg_color="green", command=self.show_peaks)
         find_peaks_button.pack(pady=10, padx=20)
 
+        # --- ROI zurücksetzen Button ---
+        clear_roi_button = ctk.CTkButton(self.left_frame, text="Auswahl aufheben", fg_color="gray25", hover_color="gray15", command=self.clear_roi)
+        clear_roi_button.pack(pady=(0,10), padx=20)
+
         # --- 3D Plot Mode Switch ---
-        self.dimension_switch = ctk.CTkSwitch(self.left_frame, text="3D Modus")
+        self.dimension_switch = ctk.CTkSwitch(self.left_frame, text="3D Modus", command=self.toggle_dimension)
         self.dimension_switch.pack(pady=10, padx=20)
 
         # --- Voreinstellungen ComboBox ---
@@ -105,8 +116,8 @@ class PeakFinderApp:
         self.prominence_entry.pack(pady=(0,10), padx=20)
 
         # --- Dominanz Eintrag ---
-        dominance_label = ctk.CTkLabel(self.left_frame, text="Dominanz (m):")
-        dominance_label.pack(pady=(10,0), padx=20)
+        self.dominance_label = ctk.CTkLabel(self.left_frame, text="Dominanz (m):")
+        self.dominance_label.pack(pady=(10,0), padx=20)
         self.dominance_entry = ctk.CTkEntry(self.left_frame, placeholder_text=str(self.dominance_threshold))
         self.dominance_entry.pack(pady=(0,10), padx=20)
 
@@ -145,60 +156,59 @@ class PeakFinderApp:
         style.configure("Treeview.Heading", background="#2B2B2B", foreground="white", relief="flat")
         style.map("Treeview.Heading", background=[('active', '#3C3C3C')])
 
-        # --- Tabelle erstellen ---
-        table = ttk.Treeview(self.right_frame_bottom,
-                             columns=("Nummer", "Pixel-Koord", "Breitengrad", "Längengrad", "Höhe"),
-                             show="headings")
-        
-        # Setzen der Headings
-        table.heading("Nummer", text="Nr.")
-        table.heading("Pixel-Koord", text="Pixel (x, y)")
-        table.heading("Breitengrad", text="Breitengrad")
-        table.heading("Längengrad", text="Längengrad")
-        table.heading("Höhe", text="Höhe (m)")
+        # --- Filterzeile ---
+        self.filter_entry = ctk.CTkEntry(self.right_frame_bottom, placeholder_text="Filter, z.B. höhe >= 4000, prom > 300 (Enter)")
+        self.filter_entry.pack(side="top", fill="x", padx=5, pady=(5, 5))
+        self.filter_entry.bind("<Return>", lambda e: self.apply_table_filter())
 
-        # Setzen der Spaltenbreiten und Ausrichtung
-        table.column("Nummer", width=40, anchor="center", stretch=False)
-        table.column("Pixel-Koord", width=120, anchor="center", stretch=True)
-        table.column("Breitengrad", width=150, anchor="center", stretch=True)
-        table.column("Längengrad", width=150, anchor="center", stretch=True)
-        table.column("Höhe", width=80, anchor="center", stretch=True)
+        # --- Tabelle erstellen (virtualisiert, nur sichtbare Zeilen werden befüllt) ---
+        table_frame = ctk.CTkFrame(self.right_frame_bottom, fg_color="transparent")
+        table_frame.pack(side="top", expand=True, fill="both")
+        self.peaks_table = VirtualPeakTable(table_frame, row_height=25)
 
-        self.peaks_table = table
-        self.peaks_table.pack(expand=True, fill="both")
+
+    def apply_table_filter(self):
+        """Wendet den Filterausdruck aus der Filterzeile auf die Gipfel-Tabelle an."""
+        try:
+            self.peaks_table.set_filter(self.filter_entry.get())
+            print(f"Filter angewendet: {self.peaks_table.visible_count} von {len(self.peaks_table)} Gipfeln sichtbar")
+        except ValueError as e:
+            print(f"{e}. Behalte alten Filter.")
 
 
     def _draw_plot(self, dem_data, vmin, vmax):
-        """Erstellt oder aktualisiert den 2D/3D-Plot im rechten Frame."""
-        # altes Canvas/Figure entfernen
-        if self.canvas_widget:
-            self.canvas_widget.destroy()
-            plt.close(self.canvas_figure)
-
-        # neue Figure mit Hintergrund
-        fig = plt.figure(facecolor="#2B2B2B")
-        if self.dimension_switch.get() == 1:
-            # 3D-Plot
-            ax = fig.add_subplot(111, projection='3d')
-            x = np.arange(dem_data.shape[1])
-            y = np.arange(dem_data.shape[0])
-            X, Y = np.meshgrid(x, y)
-            plt.gca().set_facecolor('#2B2B2B')
-            surf = ax.plot_surface(X, Y, dem_data, cmap="viridis", vmin=vmin, vmax=vmax)
-            fig.colorbar(surf, ax=ax, label="Höhe (m)", shrink=0.75)
-        else:
-            # 2D-Plot
-            ax = fig.add_subplot(111)
-            im = ax.imshow(dem_data, cmap="viridis", vmin=vmin, vmax=vmax)
-            fig.colorbar(im, ax=ax, label="Höhe (m)", shrink=0.75)
+        """Zeigt das DEM im rechten Frame an; die Figure wird nur beim ersten Aufruf angelegt."""
+        if self.plot is None:
+            self.plot = DemPlotRenderer(self.right_frame_top, on_roi_selected=self._on_roi_selected)
+            self.plot.widget.pack(side="top", fill="both", expand=True, padx=(0,60), pady=(10,0))
+        self.plot.set_dem(dem_data, vmin, vmax, is_3d=self.dimension_switch.get() == 1)
+
 
-        # Canvas einrichten
-        self.canvas_figure = fig
-        canvas = FigureCanvasTkAgg(fig, master=self.right_frame_top)
-        self.canvas = canvas
-        self.canvas_widget = canvas.get_tk_widget()
-        self.canvas_widget.pack(side="top", fill="both", expand=True, padx=(0,60), pady=(10,0))
-        self.canvas.draw()
+    def toggle_dimension(self):
+        """Wechselt zwischen 2D- und 3D-Ansicht und übernimmt die aktuellen Gipfel-Marker."""
+        if self.plot is None or self.dem_data is None:
+            return
+        xs, ys, _ = self.plot.peaks
+        self._draw_plot(self.dem_data, np.nanmin(self.dem_data), np.nanmax(self.dem_data))
+        if len(xs):
+            zs = self.dem_data[ys.astype(np.int64), xs.astype(np.int64)] + 10 # Offset für mehr Sichtbarkeit in 3D
+            self.plot.set_peaks(xs, ys, zs)
+
+
+    def _on_roi_selected(self, eclick, erelease):
+        """Übernimmt das per Rubber-Band gezogene Rechteck als ROI (Pixelkoordinaten)."""
+        x0, x1 = sorted((eclick.xdata, erelease.xdata))
+        y0, y1 = sorted((eclick.ydata, erelease.ydata))
+        self.roi = (int(round(x0)), int(round(y0)), int(round(x1)) + 1, int(round(y1)) + 1)
+        print(f"ROI gewählt: x {self.roi[0]}–{self.roi[2]}, y {self.roi[1]}–{self.roi[3]} (Pixel)")
+
+
+    def clear_roi(self):
+        """Hebt die ROI-Auswahl auf, die Suche läuft wieder auf der gesamten Karte."""
+        self.roi = None
+        if self.plot is not None and self.plot.roi_selector is not None:
+            self.plot.roi_selector.clear()
+        print("ROI aufgehoben, Suche auf der gesamten Karte.")
 
 
     def upload_image(self):
@@ -209,13 +219,14 @@ class PeakFinderApp:
 
         # Tabelle leeren
         if self.peaks_table:
-            for item in self.peaks_table.get_children():
-                self.peaks_table.delete(item)
+            self.peaks_table.clear()
 
         try:
             # --- Ausgelagertes DEM-Lesen ---
             dem_data, crs, transform, (xres, yres) = read_dem(file_path)
             self.dem_data = dem_data
+            self.file_path = file_path
+            self.roi = None
             self.crs_system = crs
             self.geo_transform = transform
 
@@ -227,13 +238,14 @@ class PeakFinderApp:
             try:
                 self.pixel_per_meter = calculate_pixels_per_meter(
                     self.crs_system, (xres, yres),
-                    transform.a, transform.e
+                    transform.c, transform.f
                 )
-                dom_px = self.dominance_threshold * self.pixel_per_meter[1]
-                print(f"Dominanz-Schwelle {self.dominance_threshold}m ≙ {dom_px:.2f} px")
+                self.row_scales = RowScaleTable.from_transform(self.crs_system, transform, dem_data.shape[0])
             except Exception as e:
-                print(f"Fehler Meter↔Pixel: {e}")
+                print(f"Fehler Meter↔Pixel: {e}. Dominanz wird in Pixeln verwendet.")
                 self.pixel_per_meter = None
+                self.row_scales = None
+            self.dominance_label.configure(text="Dominanz (m):" if self.row_scales is not None else "Dominanz (px):")
 
             vmin = np.nanmin(dem_data)
             vmax = np.nanmax(dem_data)
@@ -249,120 +261,105 @@ class PeakFinderApp:
 
         self.update_thresholds_from_entries() # neueste thresholds aus UI
 
-        if self.canvas_widget is None or self.dem_data is None:
+        if self.plot is None or self.dem_data is None:
             print("Keine Karte geladen oder DEM-Daten fehlen. Bitte lade zuerst eine GeoTIFF-Datei hoch.")
             return
-        if self.pixel_per_meter is None:
-             print("Pixel pro Meter konnte nicht berechnet werden. Dominanz wird evtl. nicht korrekt umgerechnet.")
-             # Entscheidung: Dominanz in Pixel verwenden, wenn Berechnung nicht möglich ist
-             dominance_pixels = self.dominance_threshold # Meter-Wert nehmen
-        else:
-            dominance_pixels = self.dominance_threshold * self.pixel_per_meter[1] # Dominanz [m] in Pixel umrechnen
+        if self.row_scales is None:
+             print("Pixel pro Meter konnte nicht berechnet werden. Dominanz wird in Pixeln verwendet.")
+        # Mit Zeilentabelle wird die Dominanz direkt in Metern berechnet, sonst in Pixeln
+        dominance_unit = "m" if self.row_scales is not None else "px"
+        self.dominance_unit = dominance_unit
+
+        size = 7
+        if self.neighbourhood_m:
+            if self.pixel_per_meter is None:
+                print("Pixel pro Meter unbekannt: Umgebungsradius wird in Pixeln verwendet.")
+            size = neighbourhood_size(self.neighbourhood_m, self.pixel_per_meter or (1, 1))
+            print(f"Umgebungsradius {self.neighbourhood_m} m ≙ Fenster {size[1]}x{size[0]} px")
 
         try:
-            fig = self.canvas_figure
-
-            if not fig.axes:
-                print("Fehler: Kein Axes-Objekt im Canvas gefunden.")
-                return
-            ax = fig.axes[0]
-
-            # Lösche alle alten Marker (Scatter-Elemente) aus dem Axes
-            elements_to_remove = [child for child in ax.get_children()
-                                  if isinstance(child, matplotlib.collections.PathCollection)]
-            if isinstance(ax, matplotlib.axes._axes.Axes) and not isinstance(ax, plt.Axes): # Checken ob 3D Axes
-                 elements_to_remove.extend([child for child in ax.collections if isinstance(child, matplotlib.collections.PathCollection)])
-
-            for element in elements_to_remove:
-                element.remove()
-
             # Alte Einträge in der Tabelle löschen
             if self.peaks_table:
-                 for item in self.peaks_table.get_children():
-                    self.peaks_table.delete(item)
-
-            print(f"Suche Gipfel mit Prominenz >= {self.prominence_threshold}m und Dominanz >= {self.dominance_threshold}m ({dominance_pixels:.2f} Pixel)")
-
-            # finde Gipfel
-            peaks = find_peaks(
-                self.dem_data,
-                prominence_threshold_val=self.prominence_threshold,
-                dominance_threshold_val=dominance_pixels,
-                orographic_dominence_threshold_val=self.orographic_threshold,
-                border_width=self.border_width,
-                min_height=self.min_height_threshold,
-            )
+                self.peaks_table.clear()
+                self.peaks_table.set_heading("dom", f"Dominanz ({dominance_unit})")
+
+            print(f"Suche Gipfel mit Prominenz >= {self.prominence_threshold}m und Dominanz >= {self.dominance_threshold}{dominance_unit}")
+
+            # finde Gipfel (mit ROI werden nur die benötigten Fenster aus der Datei gelesen)
+            if self.roi is not None:
+                peaks = find_peaks_in_roi(
+                    self.file_path,
+                    self.roi,
+                    prominence_threshold_val=self.prominence_threshold,
+                    dominance_threshold_val=self.dominance_threshold,
+                    orographic_dominence_threshold_val=self.orographic_threshold,
+                    border_width=self.border_width,
+                    min_height=self.min_height_threshold,
+                    accuracy=self.accuracy,
+                    neighbourhood_size=size,
+                    row_scales=self.row_scales,
+                )
+            else:
+                peaks = find_peaks(
+                    self.dem_data,
+                    prominence_threshold_val=self.prominence_threshold,
+                    dominance_threshold_val=self.dominance_threshold,
+                    orographic_dominence_threshold_val=self.orographic_threshold,
+                    border_width=self.border_width,
+                    min_height=self.min_height_threshold,
+                    saddle_cache=self.saddle_cache,
+                    accuracy=self.accuracy,
+                    neighbourhood_size=size,
+                    row_scales=self.row_scales,
+                )
 
             if not peaks:
                 print("Keine prominenten Gipfel gefunden mit den aktuellen Kriterien.")
+                self.plot.clear_peaks()
                 return
 
             print(f"Gefundene Gipfel: {len(peaks)}")
 
-            peak_coords_x = []
-            peak_coords_y = []
-            peak_coords_z = []# Für 3D plot
-
-            for idx, (peak_xy, peak_h, prom, dom_pix) in enumerate(peaks, start=1):
-                x, y = peak_xy
-                z = self.dem_data[y, x] # Höhe aus DEM daten
-
-                # Konvertiere Pixel-Koordinaten in CRS-Welt-Koordinaten (Rasterio)
-                try:
-                    world_x, world_y = rasterio.transform.xy(self.geo_transform, y, x)
-                except Exception as trans_e:
-                    print(f"Fehler bei der Koordinatentransformation für Gipfel {idx}: {trans_e}")
-                    continue # Skip bei Fehler
-
-                # Konvertiere CRS-Koordinaten aus der Datei zu WGS84 (Lat/Lon)
-                try:
-                    long, lat = convert_coordinates_to_wgs84(world_x, world_y, self.crs_system)
-                    long_str = f"{long:.8f}" # Formatieren
-                    lat_str = f"{lat:.8f}"  # Formatieren
-                except Exception as wgs_e:
-                    print(f"Fehler bei der Umwandlung zu WGS84 für Gipfel {idx}: {wgs_e}")
-                    long_str, lat_str = "Fehler", "Fehler" # Bei Fehler setzen
-
-                # vorbereiten der Koordinaten für den Plot
-                peak_coords_x.append(x)
-                peak_coords_y.append(y)
-                if self.dimension_switch.get() == 1:
-                    peak_coords_z.append(z + 10) # Offset für mehr Sichtbarkeit in 3D
-
-                # Tabelleintrag erstellen
-                dom_meters = dom_pix / self.pixel_per_meter[1] if self.pixel_per_meter else "N/A"
-                new_entry = (idx, f"{x}, {y}", lat_str, long_str, f"{z}")
-                self.peaks_table.insert("", "end", values=new_entry)
-
-                # Speichern der Peaks in einer CSV-Datei
-                csv_new_entry = (idx, f"{x}, {y}", lat_str, long_str, z, prom, f"{dom_meters:.2f}", f"{(prom/z)*100:.2f}")
-                self.peaks_csv.append(csv_new_entry)
-                print(f"({idx}) Gipfel: Pixel(x={x}, y={y}), Höhe={z}m, Lat={lat_str}, Lon={long_str}, Prom={prom}m, Dom={dom_meters:.2f}m, Oro. Dom={(prom/z)*100:.2f}%")
-
-
-            # Plot der Gipfel
-            plot_label = "Gipfel" if peak_coords_x else "" # Label
-            if self.dimension_switch.get() == 1 and peak_coords_x:
-                 # 3D Mode
-                 if hasattr(ax, 'scatter'):
-                    ax.scatter(peak_coords_x, peak_coords_y, peak_coords_z, c='r', marker='^', s=50, depthshade=True, label=plot_label)
-                 else:
-                     print("Warnung: Versuch, 3D-Scatter auf einem 2D-Axes zu zeichnen.")
-            elif peak_coords_x:
-                 # 2D Mode
-                 ax.scatter(peak_coords_x, peak_coords_y, c='r', marker='^', s=40, label=plot_label)
-
-
-            # Legende hinzufügen
-            if plot_label and not ax.get_legend(): # Nur eine Legende
-                 ax.legend()
-
-            # canvas aktualisieren
-            if self.canvas:
-                self.canvas.draw()
+            # Ergebnis in Spalten-Arrays überführen (alle Umrechnungen vektorisiert)
+            peak_coords_x = np.array([peak_xy[0] for peak_xy, _, _, _ in peaks], dtype=np.int64)
+            peak_coords_y = np.array([peak_xy[1] for peak_xy, _, _, _ in peaks], dtype=np.int64)
+            prominences = np.array([prom for _, _, prom, _ in peaks], dtype=np.float64)
+            dominances = np.array([dom for _, _, _, dom in peaks], dtype=np.float64)
+            heights = self.dem_data[peak_coords_y, peak_coords_x] # Höhe aus DEM daten
+
+            # Konvertiere Pixel-Koordinaten in CRS-Welt-Koordinaten (Rasterio) und weiter zu WGS84 (Lat/Lon)
+            try:
+                world_x, world_y = rasterio.transform.xy(self.geo_transform, peak_coords_y, peak_coords_x)
+                longs, lats = convert_coordinates_to_wgs84(np.asarray(world_x), np.asarray(world_y), self.crs_system)
+            except Exception as wgs_e:
+                print(f"Fehler bei der Umwandlung zu WGS84: {wgs_e}")
+                longs = lats = np.full(len(peaks), np.nan) # Bei Fehler setzen
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                orographic = np.where(heights != 0, prominences / heights * 100, np.nan)
+
+            self.peaks_table.set_data({
+                "nr": np.arange(1, len(peaks) + 1),
+                "x": peak_coords_x,
+                "y": peak_coords_y,
+                "lat": np.asarray(lats, dtype=np.float64),
+                "lon": np.asarray(longs, dtype=np.float64),
+                "hoehe": heights,
+                "prom": prominences,
+                "dom": dominances,
+                "oro": orographic,
+            })
+            print(f"{len(peaks)} Gipfel in Tabelle übernommen: Höhe {heights.min()}–{heights.max()} m, "
+                  f"Prominenz {prominences.min():g}–{prominences.max():g} m")
+
+            # Plot der Gipfel: nur die Marker werden neu gezeichnet, das DEM bleibt gepuffert
+            if self.dimension_switch.get() == 1:
+                self.plot.set_peaks(peak_coords_x, peak_coords_y, heights + 10) # Offset für mehr Sichtbarkeit in 3D
+            else:
+                self.plot.set_peaks(peak_coords_x, peak_coords_y)
 
         except AttributeError as ae:
-             print(f"AttributeError in show_peaks (möglicherweise fehlt canvas oder figure): {ae}")
+             print(f"AttributeError in show_peaks (möglicherweise fehlt der Plot): {ae}")
         except IndexError as ie:
              print(f"IndexError in show_peaks (möglicherweise Problem mit DEM-Daten oder Koordinaten): {ie}")
         except Exception as e:
@@ -375,7 +372,7 @@ class PeakFinderApp:
         """Öffnet ein neues Fenster (Placeholder)."""
         settings_window = Toplevel(self.root)
         settings_window.title("Einstellungen")
-        settings_window.geometry("300x200")
+        settings_window.geometry("300x380")
         settings_window.configure(bg=self.root.cget('bg')) 
 
         # Border-Width einstellen
@@ -385,14 +382,43 @@ class PeakFinderApp:
         bw_entry = ctk.CTkEntry(settings_window, textvariable=bw_var)
         bw_entry.pack(pady=(0,10), padx=20, fill="x")
 
+        # Genauigkeitsstufe der Prominenz einstellen
+        accuracy_labels = {"line": "Nur Linie (schnell)", "bounded": "Begrenzte Suche", "exact": "Exakt"}
+        acc_label = ctk.CTkLabel(settings_window, text="Genauigkeit Prominenz:")
+        acc_label.pack(pady=(10,5), padx=20, anchor="w")
+        acc_var = ctk.StringVar(value=accuracy_labels[self.accuracy])
+        acc_menu = ctk.CTkOptionMenu(settings_window, variable=acc_var, values=list(accuracy_labels.values()),
+                                     fg_color="gray25", button_color="gray20", button_hover_color="gray15")
+        acc_menu.pack(pady=(0,10), padx=20, fill="x")
+
+        # Umgebungsradius der lokalen Maxima einstellen
+        nb_label = ctk.CTkLabel(settings_window, text="Umgebungsradius (m, leer = 7x7 px):")
+        nb_label.pack(pady=(10,5), padx=20, anchor="w")
+        nb_var = ctk.StringVar(value="" if self.neighbourhood_m is None else f"{self.neighbourhood_m:g}")
+        nb_entry = ctk.CTkEntry(settings_window, textvariable=nb_var)
+        nb_entry.pack(pady=(0,10), padx=20, fill="x")
+
         def save_and_close():
             try:
                 val = int(bw_var.get())
                 if val >= 0:
+                    if val != self.border_width:
+                        self.saddle_cache = SaddleCache() # Rand verändert das DEM -> Sättel neu berechnen
                     self.border_width = val
                     print(f"Border-Width aktualisiert auf: {self.border_width} px")
             except ValueError:
                 print(f"Ungültige Eingabe für Randbreite: '{bw_var.get()}'. Behalte alten Wert.")
+            for key, label in accuracy_labels.items():
+                if label == acc_var.get() and key != self.accuracy:
+                    self.accuracy = key
+                    print(f"Genauigkeit aktualisiert auf: {ACCURACY_TIERS[key]}")
+            try:
+                radius = float(nb_var.get()) if nb_var.get().strip() else None
+                if radius is None or radius > 0:
+                    self.neighbourhood_m = radius
+                    print(f"Umgebungsradius aktualisiert auf: {'7x7 px' if radius is None else f'{radius:g} m'}")
+            except ValueError:
+                print(f"Ungültige Eingabe für Umgebungsradius: '{nb_var.get()}'. Behalte alten Wert.")
             settings_window.destroy()
 
         save_btn = ctk.CTkButton(settings_window, text="Speichern", command=save_and_close)
@@ -534,15 +560,15 @@ Die relative Höhe eines Gipfels im Verhältnis zu seiner Prominenz. Sie wird in
             return  # Abgebrochen
 
         # Spaltenüberschriften aus Treeview
-        cols = [ "Nr.", "Pixel-Koord", "Breitengrad", "Längengrad", "Höhe (m)", "Prominenz (m)", "Dominanz (m)", "Oro. Dominanz (%)" ]
+        cols = [ "Nr.", "Pixel-Koord", "Breitengrad", "Längengrad", "Höhe (m)", "Prominenz (m)", f"Dominanz ({self.dominance_unit})", "Oro. Dominanz (%)" ]
 
         try:
             with open(path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
                 writer.writerow(cols)
-                for item in self.peaks_csv:
-                    #row = [item[0], item[1], item[2], item[3], item[4], item[5], item[6], item[7]]
-                    writer.writerow(item)
+                # Export in aktueller Sortierung und mit aktivem Filter
+                for row in self.peaks_table.rows(filtered=True):
+                    writer.writerow(row)
             print(f"Tabelle erfolgreich exportiert nach: {path}")
         except Exception as e:
             print(f"Fehler beim Export der Tabelle: {e}")
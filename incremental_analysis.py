@@ -0,0 +1,241 @@
+import time
+import numpy as np
+
+from peak_analysis import (
+    bounded_search_box,
+    calculate_prominent_peaks,
+    check_accuracy,
+    dominance_function,
+    filter_peaks,
+    get_maxmin_saddle_tracked,
+    running_max_filter,
+    set_image_borders_to_zero,
+)
+
+
+def _intersects(a, b):
+    """Prüft, ob sich zwei Rechtecke (x0, y0, x1, y1, inklusiv) überschneiden."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _rect_distance(x, y, rect):
+    """Euklidischer Abstand eines Pixels zum nächsten Pixel eines Rechtecks (inklusiv)."""
+    dx = max(rect[0] - x, 0, x - rect[2])
+    dy = max(rect[1] - y, 0, y - rect[3])
+    return np.hypot(dx, dy)
+
+
+class IncrementalPeakAnalysis:
+    """
+    Gipfelanalyse mit denselben Ergebnissen wie find_peaks, die nach lokalen DEM-Änderungen
+    nur das Nötige neu berechnet. run() führt die vollständige Analyse aus und merkt sich
+    Kandidaten, das von jeder Sattelsuche gelesene Rechteck und die Dominanzen.
+    update() berechnet danach lokale Maxima nur im geänderten Fenster neu und wiederholt nur
+    Sattelsuchen, deren gelesenes Rechteck die Änderung berührt, sowie Dominanzen, deren
+    Suchkreis die Änderung erreicht.
+    Mit row_scales (RowScaleTable aus geo_utils) wird die Dominanz wie in find_peaks in Metern berechnet.
+    """
+
+    def __init__(self, prominence_threshold_val=500, dominance_threshold_val=100, orographic_dominence_threshold_val=0,
+                 border_width=50, min_height=0, accuracy="exact", neighbourhood_size=7, row_scales=None):
+        check_accuracy(accuracy)
+        self.prominence_threshold = prominence_threshold_val
+        self.dominance_threshold = dominance_threshold_val
+        self.orographic_threshold = orographic_dominence_threshold_val
+        self.border_width = border_width
+        self.min_height = min_height
+        self.accuracy = accuracy
+        self.neighbourhood_size = neighbourhood_size
+        self._filter_radius = max(np.atleast_1d(neighbourhood_size)) // 2
+        self.row_scales = row_scales
+        self._dominance_func = dominance_function(row_scales)
+
+        self.dem_data = None
+        self.peaks = None
+        self.stats = {}
+        self._min_value = None
+        self._candidates_yx = None
+        self._saddles = {}      # (start, end) -> (Sattelhöhe, gelesenes Rechteck)
+        self._dominances = {}   # (x, y) -> (Höhe, Dominanz)
+
+    # --- Öffentliche Schnittstelle ---
+
+    def run(self, dem_data):
+        """
+        Vollständige Analyse wie find_peaks. Der Rand von dem_data wird wie dort auf 0 gesetzt.
+        Gibt eine Liste [(x, y), Höhe, Prominenz, Dominanz] zurück.
+        """
+        dem_data = set_image_borders_to_zero(dem_data, width=self.border_width)
+        self._min_value = np.min(dem_data)
+        local_max = running_max_filter(dem_data, self.neighbourhood_size) == dem_data
+        local_max[dem_data == self._min_value] = False
+        self._saddles = {}
+        self._dominances = {}
+        return self._analyse(dem_data, np.argwhere(local_max), changed=None)
+
+    def update(self, new_dem, window=None):
+        """
+        Aktualisiert das Ergebnis nach einer lokalen Änderung des DEMs.
+        :param new_dem: geändertes DEM (gleiche Form wie beim letzten Aufruf)
+        :param window: geändertes Rechteck (x0, y0, x1, y1), x1/y1 exklusiv. Wenn None, wird es aus
+                       dem Vergleich mit dem vorherigen DEM bestimmt.
+        :return: Liste [(x, y), Höhe, Prominenz, Dominanz], identisch zu find_peaks auf new_dem
+        """
+        if self.dem_data is None:
+            return self.run(new_dem)
+        if new_dem.shape != self.dem_data.shape:
+            raise ValueError(f"DEM-Form {new_dem.shape} passt nicht zur vorherigen Analyse {self.dem_data.shape}")
+
+        new_dem = set_image_borders_to_zero(new_dem, width=self.border_width)
+        diff = new_dem != self.dem_data
+        if window is None:
+            if not diff.any():
+                self.stats = {"changed_window": None}
+                return self.peaks
+            ys, xs = np.nonzero(diff)
+            changed = (int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max()))
+        else:
+            x0, y0, x1, y1 = window
+            changed = (x0, y0, x1 - 1, y1 - 1)
+            inside = np.zeros_like(diff)
+            inside[y0:y1, x0:x1] = True
+            if np.any(diff & ~inside):
+                raise ValueError(f"DEM wurde auch außerhalb des angegebenen Fensters {window} geändert")
+
+        # Ändert sich das globale Minimum, ändern sich die ausgeschlossenen Kandidaten überall
+        new_min = np.min(new_dem)
+        if new_min != self._min_value:
+            print("Globales Minimum geändert, vollständige Neuberechnung.")
+            return self.run(new_dem)
+
+        candidates_yx = self._update_candidates(new_dem, changed)
+        return self._analyse(new_dem, candidates_yx, changed)
+
+    # --- Interne Schritte ---
+
+    def _update_candidates(self, dem_data, changed):
+        """Berechnet lokale Maxima nur im Einflussbereich des Maximum-Filters um die Änderung neu."""
+        rows, cols = dem_data.shape
+        x0, y0, x1, y1 = changed
+        # Kandidatenstatus hängt von der Filter-Umgebung ab; der Filter braucht selbst noch einmal Rand
+        r = self._filter_radius
+        vx0, vy0 = max(0, x0 - r), max(0, y0 - r)
+        vx1, vy1 = min(cols, x1 + r + 1), min(rows, y1 + r + 1)
+        cx0, cy0 = max(0, vx0 - r), max(0, vy0 - r)
+        cx1, cy1 = min(cols, vx1 + r), min(rows, vy1 + r)
+
+        crop = dem_data[cy0:cy1, cx0:cx1]
+        local_max = running_max_filter(crop, self.neighbourhood_size) == crop
+        local_max[crop == self._min_value] = False
+        local_max = local_max[vy0 - cy0:vy1 - cy0, vx0 - cx0:vx1 - cx0]
+        new_inside = np.argwhere(local_max) + [vy0, vx0]
+
+        old = self._candidates_yx
+        outside = ~((old[:, 0] >= vy0) & (old[:, 0] < vy1) & (old[:, 1] >= vx0) & (old[:, 1] < vx1))
+        merged = np.concatenate([old[outside], new_inside])
+        # Reihenfolge wie np.argwhere (zeilenweise), damit die Sortierung der Vollberechnung entspricht
+        return merged[np.lexsort((merged[:, 1], merged[:, 0]))]
+
+    def _refine_saddle(self, dem_data, changed, saddles, counters):
+        """Liefert die Sattelsuche für calculate_prominent_peaks, mit Wiederverwendung alter Flutungen."""
+
+        def refine(start, end):
+            key = (tuple(int(v) for v in start), tuple(int(v) for v in end))
+            previous = self._saddles.get(key)
+            if previous is not None and changed is not None and not _intersects(previous[1], changed):
+                saddles[key] = previous
+                counters["floods_reused"] += 1
+                return previous[0]
+
+            (sx, sy), (ex, ey) = key
+            if self.accuracy == "bounded":
+                # wie get_maxmin_saddle_bounded, aber mit gelesenem Rechteck
+                bx0, by0, bx1, by1 = bounded_search_box(key[0], key[1], dem_data.shape)
+                saddle_h, (rx0, ry0, rx1, ry1) = get_maxmin_saddle_tracked(
+                    dem_data[by0:by1, bx0:bx1], (sx - bx0, sy - by0), (ex - bx0, ey - by0))
+                rect = (rx0 + bx0, ry0 + by0, rx1 + bx0, ry1 + by0)
+            else:
+                saddle_h, rect = get_maxmin_saddle_tracked(dem_data, key[0], key[1])
+            saddles[key] = (saddle_h, rect)
+            counters["floods_run"] += 1
+            return saddle_h
+
+        return refine
+
+    def _outside_circle(self, x, y, rect, radius):
+        """Prüft, ob das Rechteck vollständig außerhalb des Kreises mit Radius Dominanz (Pixel bzw. m) um (x, y) liegt."""
+        if self.row_scales is None:
+            return _rect_distance(x, y, rect) > radius
+        if not np.isfinite(radius):
+            return False
+        # konservativ über das umschließende Rechteck des Kreises in Pixeln
+        rx, ry = self.row_scales.pixel_extent(y, radius)
+        return not _intersects((x - rx, y - ry, x + rx, y + ry), rect)
+
+    def _dominance(self, changed, dominances, counters):
+        """Liefert die Dominanzberechnung für filter_peaks, mit Wiederverwendung alter Werte."""
+
+        def dominance(peak_xy, dem_data):
+            x, y = int(peak_xy[0]), int(peak_xy[1])
+            h0 = dem_data[y, x]
+            previous = self._dominances.get((x, y))
+            # gültig, solange kein geänderter Pixel im Kreis mit Radius Dominanz liegt
+            if (previous is not None and changed is not None and previous[0] == h0 and
+                    self._outside_circle(x, y, changed, previous[1])):
+                dominances[(x, y)] = previous
+                counters["dominance_reused"] += 1
+                return previous[1]
+            value = self._dominance_func(peak_xy, dem_data)
+            dominances[(x, y)] = (h0, value)
+            counters["dominance_run"] += 1
+            return value
+
+        return dominance
+
+    def _analyse(self, dem_data, candidates_yx, changed):
+        start_time = time.time()
+        counters = {"floods_run": 0, "floods_reused": 0, "dominance_run": 0, "dominance_reused": 0}
+        saddles, dominances = {}, {}
+
+        candidate_peaks_xy_list = [(c, r) for r, c in candidates_yx]
+        if candidate_peaks_xy_list:
+            prominent_peaks_info = calculate_prominent_peaks(
+                candidate_peaks_xy_list, dem_data, self.prominence_threshold,
+                use_dijkstra=self.accuracy != "line",
+                refine_saddle=self._refine_saddle(dem_data, changed, saddles, counters))
+            peaks = filter_peaks(prominent_peaks_info, dem_data, self.dominance_threshold, self.orographic_threshold,
+                                 self.min_height, dominance_func=self._dominance(changed, dominances, counters))
+        else:
+            peaks = []
+
+        self.dem_data = dem_data.copy()
+        self._candidates_yx = candidates_yx
+        self._saddles = saddles
+        self._dominances = dominances
+        self.peaks = peaks
+        self.stats = dict(counters, changed_window=changed, seconds=round(time.time() - start_time, 3))
+        print(f"Inkrementelle Analyse: {counters['floods_run']} Flutungen neu, {counters['floods_reused']} übernommen; "
+              f"{counters['dominance_run']} Dominanzen neu, {counters['dominance_reused']} übernommen")
+        return peaks
+
+
+if __name__ == "__main__":
+    from reader import read_dem
+    from peak_analysis import find_peaks
+
+    dem = read_dem("images/Valais.tif")[0]
+    analysis = IncrementalPeakAnalysis(prominence_threshold_val=100, dominance_threshold_val=20)
+    start_time = time.time()
+    analysis.run(dem.copy())
+    print(f"Vollständige Analyse: {time.time() - start_time:.2f} Sekunden")
+
+    # Lokale Änderung: Lücke füllen bzw. neue Lidar-Daten in einem 40x40-Fenster
+    edited = dem.copy()
+    edited[300:340, 600:640] += 25
+    start_time = time.time()
+    incremental = analysis.update(edited.copy(), window=(600, 300, 640, 340))
+    print(f"Inkrementelle Aktualisierung: {time.time() - start_time:.2f} Sekunden")
+
+    expected = find_peaks(edited.copy(), prominence_threshold_val=100, dominance_threshold_val=20)
+    assert incremental == expected, "Inkrementelles Ergebnis weicht von der Vollberechnung ab"
+    print("Ergebnis identisch mit vollständiger Neuberechnung.")
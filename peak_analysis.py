@@ -1,12 +1,30 @@
 import heapq  # neu ergänzen
 import numpy as np
-from scipy.ndimage import maximum_filter
 from scipy.ndimage import distance_transform_edt
 import time
 from skimage.draw import line
 from numba import njit
 
 
+# Genauigkeitsstufen der Prominenz-Berechnung (Schlüssel -> Beschreibung)
+ACCURACY_TIERS = {
+    "line": "Nur Bresenham-Linie (schnell, Näherung)",
+    "bounded": "Maximin-Suche in begrenztem Fenster um beide Gipfel",
+    "exact": "Maximin-Suche auf der gesamten Karte (exakt)",
+}
+
+
+def check_accuracy(accuracy):
+    """Prüft, ob accuracy eine der Genauigkeitsstufen aus ACCURACY_TIERS ist, sonst ValueError."""
+    if accuracy not in ACCURACY_TIERS:
+        raise ValueError(f"Unbekannte Genauigkeitsstufe '{accuracy}', erlaubt: {', '.join(ACCURACY_TIERS)}")
+
+
+# Fenstergröße der begrenzten Suche: Rand = max(Faktor * Gipfelabstand, Mindestrand) in Pixeln
+BOUNDED_SEARCH_FACTOR = 0.5
+BOUNDED_SEARCH_MIN_MARGIN = 25
+
+
 def set_image_borders_to_zero(img, width):
     """
     Setzt die Werte an den Rändern des Bildes auf 0, um sie von der Analyse auszuschließen.
@@ -14,6 +32,8 @@ def set_image_borders_to_zero(img, width):
     :param width: Breite des Randes, der auf 0 gesetzt wird
     :return: Bild mit gepaddeten Rändern
     """
+    if width <= 0:
+        return img  # img[-0:] wäre das gesamte Bild
     img[:width, :] = 0
     img[-width:, :] = 0
     img[:, :width] = 0
@@ -21,18 +41,76 @@ def set_image_borders_to_zero(img, width):
     return img
 
 
-def find_local_maxima(img_data, border_width=2):
+@njit
+def _running_max_rows(img, half, pad_value):
+    """
+    Laufendes Maximum über [x - half, x + half] in jeder Zeile nach van Herk/Gil-Werman.
+    Pro Pixel drei Vergleiche, unabhängig von der Fenstergröße. Außerhalb des Bildes gilt pad_value.
+    """
+    rows, cols = img.shape
+    w = 2 * half + 1
+    n_pad = ((cols + 2 * half + w - 1) // w) * w  # gepaddete Zeile, Vielfaches der Fensterbreite
+    out = np.empty_like(img)
+    g = np.empty(n_pad, dtype=img.dtype)  # Präfix-Maximum innerhalb jedes Blocks
+    h = np.empty(n_pad, dtype=img.dtype)  # Suffix-Maximum innerhalb jedes Blocks
+    for r in range(rows):
+        for i in range(n_pad):
+            k = i - half
+            v = img[r, k] if 0 <= k < cols else pad_value
+            g[i] = v if i % w == 0 else max(g[i - 1], v)
+        for i in range(n_pad - 1, -1, -1):
+            k = i - half
+            v = img[r, k] if 0 <= k < cols else pad_value
+            h[i] = v if i % w == w - 1 else max(h[i + 1], v)
+        # Fenster von x beginnt im gepaddeten Index x und endet bei x + w - 1
+        for x in range(cols):
+            out[r, x] = max(h[x], g[x + w - 1])
+    return out
+
+
+def running_max_filter(img, size):
+    """
+    Separabler Maximum-Filter (van Herk/Gil-Werman), gleiches Ergebnis wie
+    scipy.ndimage.maximum_filter mit ungerader Fenstergröße, aber mit konstantem Aufwand je Pixel.
+    :param img: 2D-Array
+    :param size: Fenstergröße in Pixeln, int oder (Zeilen, Spalten); gerade Größen werden aufgerundet
+    """
+    size_y, size_x = (size, size) if np.isscalar(size) else size
+    pad_value = -np.inf if np.issubdtype(img.dtype, np.floating) else np.iinfo(img.dtype).min
+    out = np.ascontiguousarray(img)
+    if size_x // 2 > 0:
+        out = _running_max_rows(out, size_x // 2, pad_value)
+    if size_y // 2 > 0:
+        out = _running_max_rows(np.ascontiguousarray(out.T), size_y // 2, pad_value).T
+    return out
+
+
+def neighbourhood_size(radius_m, pixel_per_meter):
+    """
+    Rechnet einen Umgebungsradius in Metern in die Fenstergröße des Maximum-Filters um.
+    Berücksichtigt unterschiedliche Pixelgrößen in x und y (z.B. geographische DEMs).
+    :param radius_m: Radius in Metern
+    :param pixel_per_meter: (x, y) aus calculate_pixels_per_meter
+    :return: (Zeilen, Spalten), jeweils ungerade und mindestens 3
+    """
+    half_x = max(1, int(round(radius_m * pixel_per_meter[0])))
+    half_y = max(1, int(round(radius_m * pixel_per_meter[1])))
+    return 2 * half_y + 1, 2 * half_x + 1
+
+
+def find_local_maxima(img_data, border_width=2, size=7):
     """
     Findet lokale Maxima in einem Bildarray und schließt Punkte am Rand aus.
     Gibt eine Liste von Koordinaten zurück, die die Positionen der lokalen Maxima darstellen.
     :param img_data: 2D-Array der Höhenwerte
     :param border_width: Breite des Randes, der ausgeschlossen wird
+    :param size: Fenstergröße der Umgebung in Pixeln, int oder (Zeilen, Spalten), siehe neighbourhood_size
     """
     # Ränder des Bildes ausschließen
     img_data = set_image_borders_to_zero(img_data, width=border_width)
 
     # Filter data with maximum filter to find maximum filter response in each neighbourhood
-    max_out = maximum_filter(img_data, size=7)
+    max_out = running_max_filter(img_data, size)
 
     # Find local maxima
     local_max = np.zeros((img_data.shape))
@@ -121,11 +199,223 @@ def get_maxmin_saddle(height_map, start, end):
     return best[ey, ex]  # Falls Ziel nie erreicht wurde
 
 
-def calculate_prominent_peaks(candidate_peaks_xy, height_map, prominence_threshold, use_dijkstra=True):
+@njit
+def get_maxmin_saddle_tracked(height_map, start, end):
+    """
+    Wie get_maxmin_saddle, gibt zusätzlich das Rechteck (x0, y0, x1, y1, inklusiv) aller Pixel zurück,
+    deren Höhe die Flutung gelesen hat. Ändert sich das DEM außerhalb dieses Rechtecks,
+    liefert die Flutung unverändert dieselbe Sattelhöhe.
+    """
+    rows, cols = height_map.shape
+    sx, sy = start
+    ex, ey = end
+
+    best = np.full((rows, cols), -np.inf, dtype=np.float64)
+    best[sy, sx] = float(height_map[sy, sx])
+    pq = [(-best[sy, sx], sx, sy)]
+    x0, y0, x1, y1 = sx, sy, sx, sy
+
+    while pq:
+        cur_min_neg, x, y = heapq.heappop(pq)
+        cur_min = -float(cur_min_neg)
+
+        if (x, y) == (ex, ey):
+            return cur_min, (x0, y0, x1, y1)
+
+        # gelesen werden die 4-Nachbarn des entnommenen Pixels
+        x0, y0 = min(x0, max(x - 1, 0)), min(y0, max(y - 1, 0))
+        x1, y1 = max(x1, min(x + 1, cols - 1)), max(y1, min(y + 1, rows - 1))
+        for dx, dy in ((1,0), (-1,0), (0,1), (0,-1)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < cols and 0 <= ny < rows:
+                neigh_h = float(height_map[ny, nx])
+                saddle = min(cur_min, neigh_h)
+                if saddle > best[ny, nx]:
+                    best[ny, nx] = saddle
+                    heapq.heappush(pq, (-saddle, nx, ny))
+
+    return best[ey, ex], (x0, y0, x1, y1)
+
+
+def bounded_search_box(start, end, shape, factor=BOUNDED_SEARCH_FACTOR, min_margin=BOUNDED_SEARCH_MIN_MARGIN):
+    """
+    Rechteck (x0, y0, x1, y1), x1/y1 exklusiv, der begrenzten Sattelsuche: das Rechteck um start und end,
+    erweitert um max(factor * Abstand, min_margin) Pixel und auf shape (Zeilen, Spalten) beschnitten.
+    """
+    rows, cols = shape
+    sx, sy = start
+    ex, ey = end
+    margin = int(max(factor * np.hypot(ex - sx, ey - sy), min_margin))
+    return (max(0, min(sx, ex) - margin), max(0, min(sy, ey) - margin),
+            min(cols, max(sx, ex) + margin + 1), min(rows, max(sy, ey) + margin + 1))
+
+
+def get_maxmin_saddle_bounded(height_map, start, end, factor=BOUNDED_SEARCH_FACTOR, min_margin=BOUNDED_SEARCH_MIN_MARGIN):
+    """
+    Maximin-Sattel wie get_maxmin_saddle, aber nur innerhalb des Rechtecks um start und end,
+    erweitert um max(factor * Abstand, min_margin) Pixel (siehe bounded_search_box).
+    Da weniger Pfade zur Verfügung stehen, ist das Ergebnis höchstens so hoch wie der exakte Sattel.
+    start,end: (x,y)-Tupel in Pixelkoordinaten.
+    """
+    sx, sy = start
+    ex, ey = end
+    x0, y0, x1, y1 = bounded_search_box(start, end, height_map.shape, factor, min_margin)
+    window = height_map[y0:y1, x0:x1]
+    return get_maxmin_saddle(window, (int(sx - x0), int(sy - y0)), (int(ex - x0), int(ey - y0)))
+
+
+@njit
+def get_maxmin_saddle_in_window(height_map, start, end, open_edges):
+    """
+    Maximin-Sattel wie get_maxmin_saddle für einen Ausschnitt eines größeren DEMs.
+    open_edges: Bool-Array (links, rechts, oben, unten), True wenn dort das DEM weitergeht.
+    Gibt (Sattelhöhe, escaped) zurück. escaped ist True, wenn die Flutung einen offenen Rand
+    mit einem Wert über der Sattelhöhe erreicht hat – dann könnte ein Pfad außerhalb des
+    Ausschnitts einen höheren Sattel liefern und das Fenster muss vergrößert werden.
+    """
+    rows, cols = height_map.shape
+    sx, sy = start
+    ex, ey = end
+
+    best = np.full((rows, cols), -np.inf, dtype=np.float64)
+    best[sy, sx] = float(height_map[sy, sx])
+    pq = [(-best[sy, sx], sx, sy)]
+    edge_max = -np.inf
+
+    while pq:
+        cur_min_neg, x, y = heapq.heappop(pq)
+        cur_min = -float(cur_min_neg)
+        if cur_min < best[y, x]:
+            continue  # veralteter Eintrag
+
+        if ((open_edges[0] and x == 0) or (open_edges[1] and x == cols - 1) or
+                (open_edges[2] and y == 0) or (open_edges[3] and y == rows - 1)):
+            edge_max = max(edge_max, cur_min)
+
+        if x == ex and y == ey:
+            return cur_min, edge_max > cur_min
+
+        for dx, dy in ((1,0), (-1,0), (0,1), (0,-1)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < cols and 0 <= ny < rows:
+                neigh_h = float(height_map[ny, nx])
+                saddle = min(cur_min, neigh_h)
+                if saddle > best[ny, nx]:
+                    best[ny, nx] = saddle
+                    heapq.heappush(pq, (-saddle, nx, ny))
+
+    return best[ey, ex], edge_max > best[ey, ex]
+
+
+@njit
+def get_maxmin_saddles_from(height_map, start, targets):
+    """
+    Gruppierte Variante von get_maxmin_saddle: Eine einzige Maximin-Flutung ab start
+    liefert die Sattelhöhe zu allen Zielpunkten gleichzeitig (der Bottleneck-Pfad ist symmetrisch).
+    Die Flutung endet, sobald alle Ziele abgeschlossen sind.
+    start: (x,y)-Tupel, targets: Array der Form (n, 2) mit (x,y)-Pixelkoordinaten.
+    Gibt ein Array mit den Sattelhöhen in der Reihenfolge von targets zurück.
+    """
+    rows, cols = height_map.shape
+    sx, sy = start
+    n = targets.shape[0]
+
+    saddles = np.full(n, -np.inf, dtype=np.float64)
+    target_idx = np.full((rows, cols), -1, dtype=np.int64)
+    for k in range(n):
+        target_idx[targets[k, 1], targets[k, 0]] = k
+
+    best = np.full((rows, cols), -np.inf, dtype=np.float64)
+    best[sy, sx] = float(height_map[sy, sx])
+    pq = [(-best[sy, sx], sx, sy)]
+    remaining = n
+
+    while pq and remaining > 0:
+        cur_min_neg, x, y = heapq.heappop(pq)
+        cur_min = -float(cur_min_neg)
+        if cur_min < best[y, x]:
+            continue  # veralteter Eintrag
+
+        # Erstes gültiges Entnehmen eines Ziels ist endgültig
+        k = target_idx[y, x]
+        if k >= 0:
+            saddles[k] = cur_min
+            target_idx[y, x] = -1
+            remaining -= 1
+
+        for dx, dy in ((1,0), (-1,0), (0,1), (0,-1)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < cols and 0 <= ny < rows:
+                neigh_h = float(height_map[ny, nx])
+                saddle = min(cur_min, neigh_h)
+                if saddle > best[ny, nx]:
+                    best[ny, nx] = saddle
+                    heapq.heappush(pq, (-saddle, nx, ny))
+
+    return saddles
+
+
+class SaddleCache:
+    """
+    Zwischenspeicher für Maximin-Sattelhöhen, gruppiert nach Ziel-Gipfel:
+    je Ziel (x,y) die bereits bestimmten Sattelhöhen {(x,y) Kandidat: Sattelhöhe}.
+    Gilt nur für ein Höhenmodell, bei einem anderen height_map-Objekt wird er geleert.
+    Wiederholte Aufrufe (z.B. mit anderer Prominenz-Schwelle) nutzen die Werte erneut.
+    """
+
+    def __init__(self):
+        self.height_map = None
+        self.groups = {}
+        self.floods = 0      # tatsächlich ausgeführte Flutungen
+        self.hits = 0        # aus dem Cache beantwortete Sattel-Abfragen
+
+    def bind(self, height_map):
+        """Bindet den Cache an ein Höhenmodell und leert ihn bei einem Wechsel."""
+        if self.height_map is not height_map:
+            self.height_map = height_map
+            self.groups = {}
+            self.floods = 0
+            self.hits = 0
+
+    def saddles(self, target, sources, grouped=True):
+        """
+        Gibt die Sattelhöhen zwischen target und allen sources zurück.
+        Fehlende Werte werden bei grouped=True mit einer einzigen Flutung ab target ergänzt,
+        sonst mit je einer Flutung ab dem Kandidaten (get_maxmin_saddle).
+        """
+        group = self.groups.setdefault(target, {})
+        missing = [k for k, s in enumerate(sources) if s not in group]
+        self.hits += len(sources) - len(missing)
+        if missing and grouped:
+            missing_xy = np.array([sources[k] for k in missing], dtype=np.int64)
+            values = get_maxmin_saddles_from(self.height_map, target, missing_xy)
+            self.floods += 1
+            for k, v in zip(missing, values):
+                group[sources[k]] = v
+        else:
+            for k in missing:
+                group[sources[k]] = get_maxmin_saddle(self.height_map, sources[k], target)
+                self.floods += 1
+        return [group[s] for s in sources]
+
+
+def calculate_prominent_peaks(candidate_peaks_xy, height_map, prominence_threshold, use_dijkstra=True, group_saddles=False, saddle_cache=None, bounded_search=False, with_line_prominence=False, with_exact_prominence=False, refine_saddle=None):
     """
     Beschleunigte Version der Prominenz-Berechnung mit Numba für den Nearest-Higher-Teil.
     Ohne Parallelisierung, behält volle Genauigkeit bei.
     :param use_dijkstra: Wenn False, nutzt nur Bresenham-Approximation und überspringt Maximin-Dijkstra
+    :param group_saddles: Wenn True, wird je nächsthöherem Gipfel nur eine Maximin-Flutung
+                          für alle Kandidaten ausgeführt, die auf ihn zeigen (gleiches Ergebnis).
+                          Spart Flutungen, eine Flutung ab dem höheren Gipfel ist aber meist teurer.
+    :param saddle_cache: Optionaler SaddleCache, um Flutungen über mehrere Aufrufe wiederzuverwenden
+    :param bounded_search: Wenn True, sucht der Maximin-Dijkstra nur in einem Fenster um beide Gipfel
+                           (siehe get_maxmin_saddle_bounded); Cache und Gruppierung werden nicht genutzt
+    :param with_line_prominence: Wenn True, enthält jedes Ergebnis als viertes Element die Prominenz
+                                 der Bresenham-Approximation (Vorfilter) als Float
+    :param with_exact_prominence: Wenn True, wird zusätzlich die ungerundete Prominenz als Float angehängt
+                                  (danach filtert prominence_threshold, das dritte Element ist abgeschnitten)
+    :param refine_saddle: Optionale Funktion (start, end) -> Sattelhöhe für die feine Berechnung;
+                          ersetzt Cache, Gruppierung und begrenzte Suche
     """
     if not candidate_peaks_xy:
         return []
@@ -134,40 +424,74 @@ def calculate_prominent_peaks(candidate_peaks_xy, height_map, prominence_thresho
     coords = np.array(candidate_peaks_xy, dtype=np.int64)  # shape (n, 2)
     heights = height_map[coords[:, 1], coords[:, 0]].astype(np.int64)
 
-    # Absteigend nach Höhe sortieren
-    order = np.argsort(-heights)
+    # Absteigend nach Höhe sortieren; stabil, damit gleich hohe Gipfel in Zeilenreihenfolge (y, x) bleiben
+    order = np.argsort(-heights, kind="stable")
     coords = coords[order]
     heights = heights[order]
 
     # Nearest-Higher jitted finden
     nearest = compute_nearest_higher(coords, heights)
 
-    prominent_peaks = []
+    # Sattel erst mit Bresenham-Approximation; Kandidaten für die feine Berechnung sammeln
+    saddles = np.zeros(len(coords), dtype=np.float64)
+    line_saddles = np.zeros(len(coords), dtype=np.float64)
+    needs_refinement = []
     for i in range(len(coords)):
         x, y = coords[i]
-        h = heights[i]
         j = nearest[i]
-
         if j == -1:
-            # Höchster Peak
+            continue  # Höchster Peak
+
+        path = get_path_between_points((x, y), tuple(coords[j]))
+        saddles[i] = min(height_map[yy, xx] for xx, yy in path)
+        line_saddles[i] = saddles[i]
+        if use_dijkstra and heights[i] - saddles[i] >= prominence_threshold:
+            needs_refinement.append(i)
+
+    # Feine Berechnung des Sattels mit Maximin-Dijkstra, nach nächsthöherem Gipfel gruppiert
+    if needs_refinement and refine_saddle is not None:
+        for i in needs_refinement:
+            saddles[i] = refine_saddle(tuple(coords[i]), tuple(coords[nearest[i]]))
+    elif needs_refinement and bounded_search:
+        for i in needs_refinement:
+            saddles[i] = get_maxmin_saddle_bounded(height_map, tuple(coords[i]), tuple(coords[nearest[i]]))
+    elif needs_refinement:
+        if saddle_cache is None:
+            saddle_cache = SaddleCache()
+        saddle_cache.bind(height_map)
+        floods_before = saddle_cache.floods
+        hits_before = saddle_cache.hits
+
+        groups = {}
+        for i in needs_refinement:
+            groups.setdefault(nearest[i], []).append(i)
+        for j, members in groups.items():
+            sources = [(int(coords[i, 0]), int(coords[i, 1])) for i in members]
+            target = (int(coords[j, 0]), int(coords[j, 1]))
+            refined = saddle_cache.saddles(target, sources, grouped=group_saddles)
+            saddles[members] = refined
+
+        floods = saddle_cache.floods - floods_before
+        hits = saddle_cache.hits - hits_before
+        print(f"Sattelsuche: {floods} Flutungen für {len(needs_refinement)} Kandidaten "
+              f"({len(needs_refinement) - floods} gespart, davon {hits} aus dem Cache)")
+
+    prominent_peaks = []
+    for i in range(len(coords)):
+        x, y = coords[i]
+        h = heights[i]
+        if nearest[i] == -1:
             if h >= prominence_threshold:
-                prominent_peaks.append(((x, y), int(h), int(h)))
+                peak = ((x, y), int(h), int(h))
+                peak += (float(h),) if with_line_prominence else ()
+                prominent_peaks.append(peak + (float(h),) if with_exact_prominence else peak)
             continue
 
-        # Pfad und Sattelpunkt erst mit Bresenham-Approximation
-        path = get_path_between_points((x, y), tuple(coords[j]))
-        saddle_h = min(height_map[yy, xx] for xx, yy in path)
-        prom = h - saddle_h
+        prom = h - saddles[i]
         if prom >= prominence_threshold:
-            if use_dijkstra:
-                # Feine Berechnung des Sattels mit Maximin-Dijkstra
-                saddle_h = get_maxmin_saddle(height_map, (x, y), tuple(coords[j]))
-                prom = h - saddle_h
-                if prom >= prominence_threshold:
-                    prominent_peaks.append(((x, y), int(h), int(prom)))
-            else:
-                # Nur Bresenham-Pfad nutzen
-                prominent_peaks.append(((x, y), int(h), int(prom)))
+            peak = ((x, y), int(h), int(prom))
+            peak += (float(h - line_saddles[i]),) if with_line_prominence else ()
+            prominent_peaks.append(peak + (float(prom),) if with_exact_prominence else peak)
 
     print(f"Anzahl prominenter Gipfel: {len(prominent_peaks)}")
     return prominent_peaks
@@ -189,6 +513,55 @@ def calculate_dominance_distance(peak_xy, height_map):
     dist_map = distance_transform_edt(mask)
     return dist_map[y, x]
 
+def calculate_dominance_metric(peak_xy, height_map, row_scales, row_offset=0, start_radius=16):
+    """
+    Berechnet die Dominanz in Metern: Abstand zum nächsten Pixel mit Höhe >= Gipfelhöhe,
+    gemessen mit den Zeilentabellen eines RowScaleTable (geo_utils).
+    Gesucht wird in einem wachsenden Fenster um den Gipfel; sobald das Fenster den Kreis mit dem
+    gefundenen Abstand vollständig enthält, ist das Ergebnis exakt.
+    :param peak_xy: (x, y) des Gipfels in height_map
+    :param height_map: 2D-Array mit Höhenwerten (ganzes DEM oder Ausschnitt)
+    :param row_scales: RowScaleTable des gesamten DEMs
+    :param row_offset: Zeile des Gesamtbildes, bei der height_map beginnt (bei Ausschnitten)
+    :return: Dominanz in Metern, np.inf wenn kein höherer Pixel existiert
+    """
+    x, y = int(peak_xy[0]), int(peak_xy[1])
+    h0 = height_map[y, x]
+    rows, cols = height_map.shape
+    radius = start_radius
+    while True:
+        x0, x1 = max(0, x - radius), min(cols, x + radius + 1)
+        y0, y1 = max(0, y - radius), min(rows, y + radius + 1)
+        is_full = x0 == 0 and y0 == 0 and x1 == cols and y1 == rows
+        ys, xs = np.nonzero(height_map[y0:y1, x0:x1] >= h0)
+        ys += y0
+        xs += x0
+        others = (xs != x) | (ys != y)
+        if not others.any():
+            if is_full:
+                return np.inf
+            radius *= 2
+            continue
+
+        dist = row_scales.distances(x, y + row_offset, xs[others], ys[others] + row_offset).min()
+        rx, ry = row_scales.pixel_extent(y + row_offset, dist)
+        covered = ((x - rx >= x0 or x0 == 0) and (x + rx < x1 or x1 == cols) and
+                   (y - ry >= y0 or y0 == 0) and (y + ry < y1 or y1 == rows))
+        if covered or is_full:
+            return dist
+        radius = max(2 * radius, rx, ry)
+
+
+def dominance_function(row_scales=None):
+    """
+    Dominanzfunktion (peak_xy, height_map) -> Dominanz für filter_peaks: in Pixeln
+    (calculate_dominance_distance) oder mit RowScaleTable in Metern (calculate_dominance_metric).
+    """
+    if row_scales is None:
+        return calculate_dominance_distance
+    return lambda peak_xy, height_map: calculate_dominance_metric(peak_xy, height_map, row_scales)
+
+
 def calculate_orographic_dominance(peak_height, prominence):
     """
     Berechnet die orographische Dominanz eines Gipfels. (Relative Prominenz)
@@ -197,25 +570,14 @@ def calculate_orographic_dominance(peak_height, prominence):
         return 0
     return (prominence / peak_height) * 100
 
-def find_peaks(dem_data, prominence_threshold_val=500, dominance_threshold_val=100, orographic_dominence_threshold_val=0, border_width=50, min_height=0):
+def filter_peaks(prominent_peaks_info, dem_data, dominance_threshold_val=100, orographic_dominence_threshold_val=0, min_height=0, dominance_func=calculate_dominance_distance):
     """
-    Findet lokale Maxima und filtert sie dann nach Prominenz, Dominanz und Mindesthöhe.
-    Gibt eine Liste aller prominenten Gipfel zurück: [(x, y), Höhe, Prominenz, Dominanz]
-    :param dem_data: 2D-Array der Höhenwerte (DEM-Daten)
-    :param prominence_threshold_val: Mindestwert für die Prominenz
-    :param dominance_threshold_val: Mindestwert für die Dominanz
-    :param orographic_dominence_threshold_val: Mindestwert für die orographische Dominanz
-    :param border_width: Breite des Randes, der ausgeschlossen wird
-    :param min_height: Mindesthöhe, die ein Gipfel haben muss, um berücksichtigt zu werden
+    Filtert prominente Gipfel nach Mindesthöhe, orographischer Dominanz und Dominanz.
+    Gibt eine Liste [(x, y), Höhe, Prominenz, Dominanz] absteigend nach Höhe zurück.
+    :param prominent_peaks_info: Ergebnis von calculate_prominent_peaks: [((x, y), Höhe, Prominenz), ...]
+    :param dem_data: 2D-Array der Höhenwerte (mit ausgeschlossenem Rand wie in find_local_maxima)
+    :param dominance_func: Funktion (peak_xy, dem_data) -> Dominanz (in derselben Einheit wie die Schwelle)
     """
-    candidate_peaks_yx = find_local_maxima(dem_data, border_width)  # Gibt [[y,x], ...] zurück
-
-    if not candidate_peaks_yx.size:
-        return []
-
-    candidate_peaks_xy_list = [(c, r) for r, c in candidate_peaks_yx]  # Konvertiere in eine Liste von (x, y)-Koordinaten
-    prominent_peaks_info = calculate_prominent_peaks(candidate_peaks_xy_list, dem_data, prominence_threshold_val)  # Berechne die Prominenz und filtere danach -> Liste
-
     filtered_peaks = []
     sorted_peaks = sorted([(peak_xy, peak_h, prominence) for peak_xy, peak_h, prominence in prominent_peaks_info], key=lambda p: -p[1])
     for i, (peak_xy, peak_h, prominence) in enumerate(sorted_peaks):
@@ -233,7 +595,7 @@ def find_peaks(dem_data, prominence_threshold_val=500, dominance_threshold_val=1
         if not higher_peaks: # Wenn es keine höheren Gipfel gibt, ist die Dominanz unendlich
             dominance = np.inf
         else: 
-            dominance = calculate_dominance_distance(peak_xy, dem_data)            
+            dominance = dominance_func(peak_xy, dem_data)
         if dominance >= dominance_threshold_val:
             filtered_peaks.append((peak_xy, peak_h, prominence, dominance))
             # print(f"  Prominenter Gipfel: {peak_xy} (x,y) mit Höhe: {peak_h}, Prominenz: {prominence}, Dominanz: {dominance}")
@@ -242,6 +604,50 @@ def find_peaks(dem_data, prominence_threshold_val=500, dominance_threshold_val=1
     return filtered_peaks
 
 
+def find_peaks(dem_data, prominence_threshold_val=500, dominance_threshold_val=100, orographic_dominence_threshold_val=0, border_width=50, min_height=0, group_saddles=False, saddle_cache=None, accuracy="exact", neighbourhood_size=7, row_scales=None):
+    """
+    Findet lokale Maxima und filtert sie dann nach Prominenz, Dominanz und Mindesthöhe.
+    Gibt eine Liste aller prominenten Gipfel zurück: [(x, y), Höhe, Prominenz, Dominanz]
+    :param dem_data: 2D-Array der Höhenwerte (DEM-Daten) oder CompressedTileStore. Beim Kachelspeicher
+                     begrenzt roi_analysis.find_peaks_blockwise das Fenster der exakten Sattelsuche
+                     (MAX_WINDOW_FRACTION); betroffene Gipfel werden wie in Stufe "bounded" berechnet.
+    :param prominence_threshold_val: Mindestwert für die Prominenz
+    :param dominance_threshold_val: Mindestwert für die Dominanz
+    :param orographic_dominence_threshold_val: Mindestwert für die orographische Dominanz
+    :param border_width: Breite des Randes, der ausgeschlossen wird
+    :param min_height: Mindesthöhe, die ein Gipfel haben muss, um berücksichtigt zu werden
+    :param group_saddles: Sattelsuche je nächsthöherem Gipfel gruppieren (siehe calculate_prominent_peaks)
+    :param saddle_cache: Optionaler SaddleCache für wiederholte Aufrufe auf demselben DEM
+    :param accuracy: Genauigkeitsstufe der Prominenz ("line", "bounded" oder "exact", siehe ACCURACY_TIERS)
+    :param neighbourhood_size: Fenstergröße der lokalen Maxima in Pixeln, int oder (Zeilen, Spalten), siehe neighbourhood_size()
+    :param row_scales: Optionaler RowScaleTable (geo_utils). Dann werden Dominanz-Schwelle und Dominanz
+                       in Metern angegeben bzw. zurückgegeben, sonst in Pixeln.
+    """
+    check_accuracy(accuracy)
+
+    if hasattr(dem_data, "read_window"):
+        # Komprimierter Kachelspeicher: blockweise analysieren, Fenster wachsen nur über Kacheln mit passenden Maxima
+        from roi_analysis import find_peaks_blockwise
+        return find_peaks_blockwise(dem_data, prominence_threshold_val=prominence_threshold_val,
+                                    dominance_threshold_val=dominance_threshold_val,
+                                    orographic_dominence_threshold_val=orographic_dominence_threshold_val,
+                                    border_width=border_width, min_height=min_height, accuracy=accuracy,
+                                    neighbourhood_size=neighbourhood_size, row_scales=row_scales)
+
+    candidate_peaks_yx = find_local_maxima(dem_data, border_width, neighbourhood_size)  # Gibt [[y,x], ...] zurück
+
+    if not candidate_peaks_yx.size:
+        return []
+
+    candidate_peaks_xy_list = [(c, r) for r, c in candidate_peaks_yx]  # Konvertiere in eine Liste von (x, y)-Koordinaten
+    prominent_peaks_info = calculate_prominent_peaks(candidate_peaks_xy_list, dem_data, prominence_threshold_val,
+                                                     use_dijkstra=accuracy != "line", bounded_search=accuracy == "bounded",
+                                                     group_saddles=group_saddles, saddle_cache=saddle_cache)  # Berechne die Prominenz und filtere danach -> Liste
+
+    return filter_peaks(prominent_peaks_info, dem_data, dominance_threshold_val,
+                        orographic_dominence_threshold_val, min_height, dominance_func=dominance_function(row_scales))
+
+
 if __name__ == "__main__":
     # Beispiel-Test mit einem künstlichen DEM-Array
     print("\n--- Test für find_peaks ---")
@@ -272,6 +678,24 @@ if __name__ == "__main__":
     _ = calculate_prominent_peaks(candidate_peaks_xy, large_test_data, prominence_threshold=100, use_dijkstra=False)
     end_time = time.time()
     print(f"  Dauer: {end_time - start_time:.5f} Sekunden")
+
+    # Gruppierte Sattelsuche auf den mitgelieferten DEMs: gesparte Flutungen und Laufzeit
+    import glob
+    from reader import read_dem
+    print("\n--- Gruppierte Sattelsuche auf images/*.tif ---")
+    for dem_path in sorted(glob.glob("images/*.tif")):
+        dem = read_dem(dem_path)[0]
+        candidates = [(c, r) for r, c in find_local_maxima(dem, border_width=50)]
+        timings = {}
+        for grouped in (False, True):
+            cache = SaddleCache()
+            start_time = time.time()
+            result = calculate_prominent_peaks(candidates, dem, prominence_threshold=30, group_saddles=grouped, saddle_cache=cache)
+            timings[grouped] = (time.time() - start_time, cache.floods, result)
+        assert timings[False][2] == timings[True][2], "Gruppierte Sattelsuche weicht ab"
+        print(f"  {dem_path}: {timings[False][1]} -> {timings[True][1]} Flutungen "
+              f"({timings[False][1] - timings[True][1]} gespart), "
+              f"Dauer {timings[False][0]:.2f}s -> {timings[True][0]:.2f}s")
     
     """
     print(f"\nGeschwindigkeitstest für calculate_prominent_peaks normal (ohne Beschleunigung):")
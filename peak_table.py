@@ -0,0 +1,247 @@
+import re
+from tkinter import ttk
+import numpy as np
+
+
+# Spaltendefinition: (Schlüssel, Überschrift, Breite, Formatierer)
+PEAK_TABLE_COLUMNS = [
+    ("nr", "Nr.", 50, lambda d, i: f"{d['nr'][i]}"),
+    ("pixel", "Pixel (x, y)", 110, lambda d, i: f"{d['x'][i]}, {d['y'][i]}"),
+    ("lat", "Breitengrad", 130, lambda d, i: _format_float(d["lat"][i], 8, "Fehler")),
+    ("lon", "Längengrad", 130, lambda d, i: _format_float(d["lon"][i], 8, "Fehler")),
+    ("hoehe", "Höhe (m)", 80, lambda d, i: f"{d['hoehe'][i]:g}"),
+    ("prom", "Prominenz (m)", 100, lambda d, i: f"{d['prom'][i]:g}"),
+    ("dom", "Dominanz (m)", 100, lambda d, i: _format_float(d["dom"][i], 2, "N/A")),
+    ("oro", "Oro. Dom. (%)", 90, lambda d, i: _format_float(d["oro"][i], 2, "N/A")),
+]
+
+# Erlaubte Spaltennamen im Filterausdruck -> Schlüssel im Datenmodell
+FILTER_ALIASES = {
+    "nr": "nr", "x": "x", "y": "y",
+    "lat": "lat", "breitengrad": "lat",
+    "lon": "lon", "längengrad": "lon", "laengengrad": "lon",
+    "h": "hoehe", "höhe": "hoehe", "hoehe": "hoehe",
+    "prom": "prom", "prominenz": "prom",
+    "dom": "dom", "dominanz": "dom",
+    "oro": "oro",
+}
+
+_FILTER_PATTERN = re.compile(r"^\s*([^\s<>=!]+)\s*(<=|>=|==|!=|<|>|=)\s*(-?\d+(?:\.\d*)?)\s*$")
+
+_OPERATORS = {
+    "<": np.less, "<=": np.less_equal,
+    ">": np.greater, ">=": np.greater_equal,
+    "=": np.equal, "==": np.equal, "!=": np.not_equal,
+}
+
+
+def _format_float(value, digits, nan_text):
+    """Formatiert einen Float-Wert; NaN wird als nan_text und inf als ∞ dargestellt."""
+    if np.isnan(value):
+        return nan_text
+    if np.isinf(value):
+        return "∞"
+    return f"{value:.{digits}f}"
+
+
+def parse_filter(expression):
+    """
+    Wandelt einen Filterausdruck wie "höhe >= 4000, prom > 300" in eine Liste von
+    (Schlüssel, Operator-Funktion, Wert)-Tupeln um.
+    Wirft ValueError bei ungültigen Ausdrücken.
+    """
+    conditions = []
+    for part in expression.replace(";", ",").split(","):
+        if not part.strip():
+            continue
+        match = _FILTER_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"Ungültiger Filterausdruck: '{part.strip()}'")
+        name, op, value = match.groups()
+        key = FILTER_ALIASES.get(name.lower())
+        if key is None:
+            raise ValueError(f"Unbekannte Spalte im Filter: '{name}'")
+        conditions.append((key, _OPERATORS[op], float(value)))
+    return conditions
+
+
+class VirtualPeakTable:
+    """
+    Virtualisierte Gipfel-Tabelle auf Basis eines ttk.Treeview.
+    Die Daten liegen als Spalten-Arrays vor; im Treeview existieren nur so viele
+    Zeilen, wie sichtbar sind. Beim Scrollen werden lediglich deren Werte neu gesetzt,
+    Sortieren und Filtern arbeiten als Index-Operationen über das gesamte Ergebnis.
+    """
+
+    def __init__(self, master, row_height=25):
+        self.row_height = row_height
+        self._data = {}
+        self._n = 0
+        self._order = np.zeros(0, dtype=np.int64)   # Sortierreihenfolge über alle Zeilen
+        self._view = np.zeros(0, dtype=np.int64)    # sortierte und gefilterte Zeilenindizes
+        self._conditions = []
+        self._sort_key = None
+        self._sort_descending = False
+        self._offset = 0
+        self._items = []
+
+        self._headings = {key: heading for key, heading, _, _ in PEAK_TABLE_COLUMNS}
+        keys = [key for key, _, _, _ in PEAK_TABLE_COLUMNS]
+        self.tree = ttk.Treeview(master, columns=keys, show="headings", height=1, selectmode="browse")
+        for key, heading, width, _ in PEAK_TABLE_COLUMNS:
+            self.tree.heading(key, text=heading, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor="center", stretch=key != "nr")
+
+        self.scrollbar = ttk.Scrollbar(master, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", expand=True, fill="both")
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_rows(3))
+
+    # --- Datenmodell ---
+
+    def set_data(self, data):
+        """
+        Setzt das Ergebnis als Dictionary von gleich langen Arrays
+        (Schlüssel: nr, x, y, lat, lon, hoehe, prom, dom, oro).
+        Sortierung und Filter bleiben erhalten.
+        """
+        self._data = {key: np.asarray(values) for key, values in data.items()}
+        self._n = len(self._data["nr"]) if "nr" in self._data else 0
+        self._update_order()
+
+    def clear(self):
+        """Leert die Tabelle."""
+        self.set_data({})
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def visible_count(self):
+        """Anzahl der Zeilen nach Anwendung des Filters."""
+        return len(self._view)
+
+    def rows(self, filtered=False):
+        """
+        Liefert die Zeilen mit den Rohwerten aus den Spalten-Arrays (z.B. für den CSV-Export);
+        die Formatierung der Spalten gilt nur für die Anzeige.
+        :param filtered: Wenn True, nur die gefilterten Zeilen in aktueller Sortierung
+        """
+        indices = self._view if filtered else np.arange(self._n)
+        return [self._raw_row(i) for i in indices]
+
+    def _raw_row(self, i):
+        d = self._data
+        values = [d[key][i].item() for key in ("nr", "lat", "lon", "hoehe", "prom", "dom", "oro")]
+        return (values[0], f"{d['x'][i]}, {d['y'][i]}", *values[1:])
+
+    def _format_row(self, i):
+        return tuple(fmt(self._data, i) for _, _, _, fmt in PEAK_TABLE_COLUMNS)
+
+    # --- Sortieren und Filtern ---
+
+    def sort_by(self, key):
+        """Sortiert nach einer Spalte; erneuter Aufruf kehrt die Richtung um."""
+        if self._sort_key == key:
+            self._sort_descending = not self._sort_descending
+        else:
+            self._sort_key = key
+            self._sort_descending = key in ("hoehe", "prom", "dom", "oro")
+        self._update_headings()
+        self._update_order()
+
+    def set_heading(self, key, text):
+        """Ändert die Überschrift einer Spalte (z.B. die Einheit der Dominanz)."""
+        self._headings[key] = text
+        self._update_headings()
+
+    def _update_headings(self):
+        for col_key, heading in self._headings.items():
+            arrow = (" ▼" if self._sort_descending else " ▲") if col_key == self._sort_key else ""
+            self.tree.heading(col_key, text=heading + arrow)
+
+    def set_filter(self, expression):
+        """
+        Setzt einen Filterausdruck (siehe parse_filter). Ein leerer Ausdruck entfernt den Filter.
+        Wirft ValueError bei ungültigen Ausdrücken, der alte Filter bleibt dann bestehen.
+        """
+        self._conditions = parse_filter(expression)
+        self._update_view()
+
+    def _update_order(self):
+        if self._n == 0:
+            self._order = np.zeros(0, dtype=np.int64)
+        elif self._sort_key is None:
+            self._order = np.arange(self._n)
+        else:
+            if self._sort_key == "pixel":
+                order = np.lexsort((self._data["y"], self._data["x"]))
+            else:
+                order = np.argsort(self._data[self._sort_key], kind="stable")
+            self._order = order[::-1] if self._sort_descending else order
+        self._update_view()
+
+    def _update_view(self):
+        mask = np.ones(self._n, dtype=bool)
+        for key, op, value in self._conditions:
+            if key in self._data:
+                with np.errstate(invalid="ignore"):
+                    mask &= op(self._data[key], value)
+        self._view = self._order[mask[self._order]]
+        self._offset = 0
+        self._render()
+
+    # --- Darstellung ---
+
+    def _page_size(self):
+        """Anzahl vollständig sichtbarer Zeilen unter der Überschriftenzeile."""
+        heading_height, row_height = self.row_height, self.row_height
+        if self._items:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:  # y der ersten Zeile = Höhe der Überschrift
+                heading_height, row_height = bbox[1], bbox[3]
+        return max(1, (self.tree.winfo_height() - heading_height) // row_height)
+
+    def _on_configure(self, event=None):
+        page = self._page_size()
+        if page != len(self._items):
+            for item in self._items:
+                self.tree.delete(item)
+            self._items = [self.tree.insert("", "end", values=()) for _ in range(page)]
+            self.tree.configure(height=page)
+        self._render()
+
+    def _render(self):
+        """Schreibt die sichtbaren Zeilen in den Item-Pool des Treeview."""
+        total = len(self._view)
+        page = len(self._items)
+        self._offset = max(0, min(self._offset, total - page))
+        for k, item in enumerate(self._items):
+            pos = self._offset + k
+            values = self._format_row(self._view[pos]) if pos < total else ()
+            self.tree.item(item, values=values)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + page) / total))
+
+    def _scroll_rows(self, delta):
+        self._offset += delta
+        self._render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        step = -1 if event.delta > 0 else 1
+        return self._scroll_rows(3 * step)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        page = max(1, len(self._items))
+        if action == "moveto":
+            self._offset = int(float(value) * len(self._view))
+        elif action == "scroll":
+            self._offset += int(value) * (page if unit == "pages" else 1)
+        self._render()
@@ -0,0 +1,148 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.widgets import RectangleSelector
+
+BACKGROUND_COLOR = "#2B2B2B"
+
+
+class DemPlotRenderer:
+    """
+    Zeichenschicht für DEM und Gipfel-Marker mit einer einzigen, dauerhaften Figure.
+    Das DEM (Hintergrund) wird nur beim Laden bzw. beim Wechsel 2D/3D gerendert und als Bitmap
+    zwischengespeichert. Die Gipfel-Marker sind "animated" Artists: set_peaks() setzt nur deren
+    Koordinaten neu, stellt den gespeicherten Hintergrund wieder her und blittet die Marker darüber,
+    unabhängig von der Größe des DEMs.
+    """
+
+    def __init__(self, master, on_roi_selected=None):
+        self.figure = Figure(facecolor=BACKGROUND_COLOR)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.on_roi_selected = on_roi_selected
+
+        self.ax = None
+        self.image = None         # AxesImage des 2D-Plots, wird beim Laden wiederverwendet
+        self.colorbar = None
+        self.overlay = None       # Scatter der Gipfel (animated)
+        self.roi_selector = None
+        self.is_3d = None
+        self._background = None
+        self._peaks = (np.empty(0), np.empty(0), np.empty(0))
+
+        # Nach jedem vollständigen Zeichnen (Laden, Größenänderung) Hintergrund neu sichern.
+        # Vor dem RectangleSelector verbunden, damit dessen Hintergrund die Marker enthält.
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # --- Hintergrund ---
+
+    def set_dem(self, dem_data, vmin, vmax, is_3d=False):
+        """Zeigt ein DEM an. Im 2D-Modus werden Axes, Bild und Farbskala wiederverwendet."""
+        if is_3d != self.is_3d:
+            self._build_axes(is_3d)
+
+        if is_3d:
+            self.ax.clear()
+            self.ax.set_facecolor(BACKGROUND_COLOR)
+            x = np.arange(dem_data.shape[1])
+            y = np.arange(dem_data.shape[0])
+            X, Y = np.meshgrid(x, y)
+            surf = self.ax.plot_surface(X, Y, dem_data, cmap="viridis", vmin=vmin, vmax=vmax)
+            if self.colorbar is None:
+                self.colorbar = self.figure.colorbar(surf, ax=self.ax, label="Höhe (m)", shrink=0.75)
+            else:
+                self.colorbar.update_normal(surf)
+            self.overlay = None
+        elif self.image is None:
+            self.image = self.ax.imshow(dem_data, cmap="viridis", vmin=vmin, vmax=vmax)
+            self.colorbar = self.figure.colorbar(self.image, ax=self.ax, label="Höhe (m)", shrink=0.75)
+        else:
+            rows, cols = dem_data.shape
+            self.image.set_data(dem_data)
+            self.image.set_clim(vmin, vmax)
+            self.image.set_extent((-0.5, cols - 0.5, rows - 0.5, -0.5))
+            self.ax.set_xlim(-0.5, cols - 0.5)
+            self.ax.set_ylim(rows - 0.5, -0.5)
+            self.colorbar.update_normal(self.image)
+            if self.roi_selector is not None:
+                self.roi_selector.clear()
+
+        # Marker des vorherigen DEMs entfernen, bevor _on_draw sie über das neue zeichnet
+        self._peaks = (np.empty(0), np.empty(0), np.empty(0))
+        self._ensure_overlay()
+        if not self.is_3d:
+            self.overlay.set_offsets(np.empty((0, 2)))
+        self.canvas.draw()
+
+    def _build_axes(self, is_3d):
+        """Legt die Axes für den gewünschten Modus an (nur beim Wechsel 2D/3D)."""
+        self.figure.clear()
+        self.image = None
+        self.colorbar = None
+        self.overlay = None
+        self.roi_selector = None
+        self.is_3d = is_3d
+        if is_3d:
+            self.ax = self.figure.add_subplot(111, projection="3d")
+        else:
+            self.ax = self.figure.add_subplot(111)
+            if self.on_roi_selected is not None:
+                # Rubber-Band-Auswahl einer ROI (nur im 2D-Plot)
+                self.roi_selector = RectangleSelector(self.ax, self.on_roi_selected, useblit=True, button=[1],
+                                                      minspanx=3, minspany=3, spancoords="data", interactive=True,
+                                                      props=dict(edgecolor="white", fill=False, linestyle="--"))
+
+    def _ensure_overlay(self):
+        if self.overlay is not None:
+            return
+        if self.is_3d:
+            self.overlay = self.ax.scatter([], [], [], c="r", marker="^", s=50, depthshade=True, label="Gipfel")
+        else:
+            self.overlay = self.ax.scatter([], [], c="r", marker="^", s=40, label="Gipfel", animated=True)
+        self.ax.legend(handles=[self.overlay])
+
+    def _on_draw(self, event):
+        if self.is_3d is None or self.is_3d:
+            return
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        # Marker direkt nach dem Hintergrund in den Puffer zeichnen; Tk übernimmt ihn nach dem draw-Event
+        if self.overlay is not None:
+            self.ax.draw_artist(self.overlay)
+
+    # --- Gipfel-Marker ---
+
+    def set_peaks(self, xs, ys, zs=None):
+        """
+        Setzt die Gipfel-Marker. Im 2D-Modus wird nur das Overlay über den gespeicherten Hintergrund geblittet;
+        im 3D-Modus hängt die Projektion der Marker vom Blickwinkel ab, dort wird neu gezeichnet.
+        :param xs, ys: Pixelkoordinaten
+        :param zs: Höhen (nur 3D)
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        zs = np.zeros_like(xs) if zs is None else np.asarray(zs, dtype=np.float64)
+        self._peaks = (xs, ys, zs)
+        if self.ax is None:
+            return
+        self._ensure_overlay()
+
+        if self.is_3d:
+            self.overlay._offsets3d = (xs, ys, zs)
+            self.canvas.draw_idle()
+            return
+
+        self.overlay.set_offsets(np.column_stack([xs, ys]))
+        if self._background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.overlay)
+        self.canvas.blit(self.figure.bbox)
+
+    def clear_peaks(self):
+        self.set_peaks([], [])
+
+    @property
+    def peaks(self):
+        """Aktuell angezeigte Marker (xs, ys, zs), z.B. um sie nach einem Wechsel 2D/3D erneut zu setzen."""
+        return self._peaks
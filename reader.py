@@ -1,4 +1,6 @@
+import numpy as np
 import rasterio
+from rasterio.windows import Window
 
 def read_dem(file_path):
     """
@@ -13,4 +15,51 @@ def read_dem(file_path):
         crs = src.crs
         transform = src.transform
         xres, yres = src.res
-    return dem_data, crs, transform, (xres, yres)
\ No newline at end of file
+    return dem_data, crs, transform, (xres, yres)
+
+
+def read_dem_window(file_path, col_off, row_off, width, height):
+    """
+    Liest nur ein Fenster eines GeoTIFFs (Pixelkoordinaten des Gesamtbildes) und gibt zurück:
+      - dem_data (2D-Array des Fensters)
+      - transform (Affine-Transform des Fensters)
+      - shape (Zeilen, Spalten) des Gesamtbildes
+      - nodata (Nodata-Wert oder None)
+    """
+    with rasterio.open(file_path) as src:
+        window = Window(col_off, row_off, width, height)
+        dem_data = src.read(1, window=window)
+        transform = src.window_transform(window)
+        shape = (src.height, src.width)
+        nodata = src.nodata
+    return dem_data, transform, shape, nodata
+
+
+def read_dem_mosaic(file_paths, col_off, row_off, width, height):
+    """
+    Liest ein Fenster aus mehreren aneinandergrenzenden GeoTIFFs mit gleichem Pixelraster.
+    Das Fenster ist in Pixelkoordinaten der ersten Datei angegeben und darf über deren Rand
+    hinausreichen; dort werden die übrigen Dateien gelesen, Lücken mit Nodata (bzw. 0) gefüllt.
+    Gibt dieselben Werte wie read_dem zurück, mit dem Transform des Fensters.
+    """
+    with rasterio.open(file_paths[0]) as ref:
+        crs = ref.crs
+        transform = ref.window_transform(Window(col_off, row_off, width, height))
+        xres, yres = ref.res
+        fill = ref.nodata if ref.nodata is not None else 0
+        dem_data = np.full((height, width), fill, dtype=ref.dtypes[0])
+        ref_transform = ref.transform
+
+    for path in file_paths:
+        with rasterio.open(path) as src:
+            if src.crs != crs or not np.allclose(src.res, (xres, yres)):
+                raise ValueError(f"{path} hat ein anderes CRS oder eine andere Auflösung als {file_paths[0]}")
+            # Lage der Datei im Pixelraster der ersten Datei, relativ zum Fenster
+            dx = int(round((src.transform.c - ref_transform.c) / ref_transform.a)) - col_off
+            dy = int(round((src.transform.f - ref_transform.f) / ref_transform.e)) - row_off
+            x0, y0 = max(0, dx), max(0, dy)
+            x1, y1 = min(width, dx + src.width), min(height, dy + src.height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            dem_data[y0:y1, x0:x1] = src.read(1, window=Window(x0 - dx, y0 - dy, x1 - x0, y1 - y0))
+    return dem_data, crs, transform, (xres, yres)
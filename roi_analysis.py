@@ -0,0 +1,482 @@
+import numpy as np
+from matplotlib.path import Path
+from scipy.ndimage import label
+
+from peak_analysis import (
+    bounded_search_box,
+    calculate_dominance_distance,
+    calculate_dominance_metric,
+    calculate_orographic_dominance,
+    check_accuracy,
+    compute_nearest_higher,
+    get_maxmin_saddle_bounded,
+    get_maxmin_saddle_in_window,
+    get_path_between_points,
+    running_max_filter,
+)
+from reader import read_dem_window
+
+# Halbe Fenstergröße des Maximum-Filters in find_local_maxima (Standard size=7)
+FILTER_RADIUS = 3
+
+# Größtes Fenster (Anteil am DEM) für die exakte Sattelsuche in find_peaks_blockwise
+MAX_WINDOW_FRACTION = 0.25
+
+
+def _filter_radius(neighbourhood_size):
+    """Größte halbe Fenstergröße des Maximum-Filters (Zeilen bzw. Spalten)."""
+    return max(np.atleast_1d(neighbourhood_size)) // 2
+
+
+class _FileSource:
+    """Liest Fenster direkt aus einer GeoTIFF-Datei (gleiche Schnittstelle wie CompressedTileStore)."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        _, _, self.shape, self.nodata = read_dem_window(file_path, 0, 0, 1, 1)
+
+    def read_window(self, x0, y0, x1, y1):
+        return read_dem_window(self.file_path, x0, y0, x1 - x0, y1 - y0)[0]
+
+    def window_min(self, x0, y0, x1, y1, strip_rows=512):
+        """Minimum (mit Nodata) des Ausschnitts, streifenweise gelesen."""
+        return min(self.read_window(x0, y, x1, min(y1, y + strip_rows)).min() for y in range(y0, y1, strip_rows))
+
+
+def _as_source(source):
+    """Pfade werden als Datei gelesen, alles mit read_window() (z.B. CompressedTileStore) direkt verwendet."""
+    return source if hasattr(source, "read_window") else _FileSource(source)
+
+
+def roi_bounds(roi):
+    """
+    Bestimmt das umschließende Rechteck und den Enthaltensein-Test einer ROI.
+    :param roi: Rechteck (x0, y0, x1, y1) in Pixeln (x1, y1 exklusiv) oder Polygon [(x, y), ...]
+    :return: ((x0, y0, x1, y1), contains) mit contains(xs, ys) -> Bool-Array
+    """
+    if len(roi) == 4 and np.isscalar(roi[0]):
+        x0, y0, x1, y1 = (int(round(v)) for v in roi)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+
+        def contains(xs, ys):
+            return (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+
+        return (x0, y0, x1, y1), contains
+
+    vertices = np.asarray(roi, dtype=np.float64)
+    if vertices.ndim != 2 or vertices.shape[0] < 3 or vertices.shape[1] != 2:
+        raise ValueError("ROI muss ein Rechteck (x0, y0, x1, y1) oder ein Polygon mit mindestens 3 Punkten sein")
+    polygon = Path(vertices)
+    x0, y0 = np.floor(vertices.min(axis=0)).astype(int)
+    x1, y1 = np.ceil(vertices.max(axis=0)).astype(int) + 1
+
+    def contains(xs, ys):
+        return polygon.contains_points(np.column_stack([xs, ys]))
+
+    return (int(x0), int(y0), int(x1), int(y1)), contains
+
+
+def _clip_window(window, shape):
+    x0, y0, x1, y1 = window
+    rows, cols = shape
+    return int(max(0, x0)), int(max(0, y0)), int(min(cols, x1)), int(min(rows, y1))
+
+
+def _grow_window(window, shape):
+    """Vergrößert ein Fenster um seine eigene Breite bzw. Höhe in jede Richtung."""
+    x0, y0, x1, y1 = window
+    dx, dy = max(x1 - x0, 1), max(y1 - y0, 1)
+    return _clip_window((x0 - dx, y0 - dy, x1 + dx, y1 + dy), shape)
+
+
+def _candidate_minimum(source, border_width):
+    """
+    Wert, den find_local_maxima als Minimum von den Kandidaten ausschließt: das Minimum des DEMs,
+    nachdem der Rand auf 0 gesetzt wurde. Wird je Quelle und Randbreite nur einmal bestimmt.
+    """
+    cache = source.__dict__.setdefault("_candidate_minimum", {})
+    if border_width not in cache:
+        rows, cols = source.shape
+        b = max(0, border_width)
+        inner = np.inf if 2 * b >= min(rows, cols) else source.window_min(b, b, cols - b, rows - b)
+        cache[border_width] = min(inner, 0) if b > 0 else inner
+    return cache[border_width]
+
+
+def _peak_order(peak):
+    """Reihenfolge wie find_peaks: absteigend nach Höhe, gleich hohe Gipfel zeilenweise (y, x)."""
+    (x, y), h = peak[0], peak[1]
+    return -h, y, x
+
+
+def _union(a, b):
+    if a is None:
+        return b
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _area(window):
+    return (window[2] - window[0]) * (window[3] - window[1])
+
+
+class _WindowContext:
+    """Geladener Ausschnitt eines DEMs mit den Hilfsabfragen der ROI-Analyse."""
+
+    def __init__(self, source, window, border_width, neighbourhood_size=2 * FILTER_RADIUS + 1):
+        x0, y0, x1, y1 = window
+        self.source = source
+        self.neighbourhood_size = neighbourhood_size
+        self.filter_radius = _filter_radius(neighbourhood_size)
+        self.window = window
+        self.data = source.read_window(x0, y0, x1, y1)
+        self.shape, self.nodata = source.shape, source.nodata
+        rows, cols = self.shape
+        self.is_full = window == (0, 0, cols, rows)
+        self.capped = 0  # Gipfel, deren exakte Sattelsuche das Fenster zu sehr vergrößert hätte
+        # offene Ränder: links, rechts, oben, unten
+        self.open_edges = np.array([x0 > 0, x1 < cols, y0 > 0, y1 < rows])
+
+        # Rand des Gesamtbildes ausschließen wie in find_local_maxima (set_image_borders_to_zero)
+        if border_width > 0:
+            ys = np.arange(y0, y1)
+            xs = np.arange(x0, x1)
+            self.data[(ys < border_width) | (ys >= rows - border_width), :] = 0
+            self.data[:, (xs < border_width) | (xs >= cols - border_width)] = 0
+
+    def valid_box(self, inset):
+        """Rechteck (Fensterkoordinaten), in dem Ergebnisse trotz offener Ränder gültig sind."""
+        rows, cols = self.data.shape
+        left, right, top, bottom = (inset if e else 0 for e in self.open_edges)
+        return left, top, cols - right, rows - bottom
+
+    def covers_disc(self, x, y, radius, inset=0):
+        """
+        Prüft, ob der Kreis (Fensterkoordinaten) vollständig im gültigen Bereich liegt.
+        An geschlossenen Rändern (Rand des Gesamtbildes) darf der Kreis hinausragen.
+        """
+        bx0, by0, bx1, by1 = self.valid_box(inset)
+        left, right, top, bottom = self.open_edges
+        r = int(np.ceil(radius))
+        return ((not left or x - r >= bx0) and (not top or y - r >= by0) and
+                (not right or x + r < bx1) and (not bottom or y + r < by1))
+
+    def disc_window(self, x, y, radius, inset=0):
+        """Fenster (Gesamtbild-Koordinaten), das den Kreis inklusive inset enthält."""
+        r = int(np.ceil(radius)) + inset + 1
+        gx, gy = x + self.window[0], y + self.window[1]
+        return _clip_window((gx - r, gy - r, gx + r + 1, gy + r + 1), self.shape)
+
+    def higher_outside(self, x, y, value):
+        """
+        Fenster (Gesamtbild-Koordinaten), das die nächstgelegenen Kacheln mit Pixeln über value
+        außerhalb des gültigen Bereichs enthält. None, wenn die Quelle keine Kachel-Maxima kennt
+        (dann muss blind vergrößert werden); () wenn es außerhalb keinen höheren Pixel gibt.
+        """
+        if not hasattr(self.source, "higher_tile_windows"):
+            return None
+        wx0, wy0 = self.window[0], self.window[1]
+        bx0, by0, bx1, by1 = self.valid_box(self.filter_radius)
+        valid = (bx0 + wx0, by0 + wy0, bx1 + wx0, by1 + wy0)
+        gx, gy = x + wx0, y + wy0
+        outside = []
+        for tile in self.source.higher_tile_windows(value):
+            if _union(tile, valid) != valid:
+                dist = np.hypot(max(tile[0] - gx, 0, gx - tile[2] + 1), max(tile[1] - gy, 0, gy - tile[3] + 1))
+                outside.append((dist, tile))
+        if not outside:
+            return ()
+        # alle Kacheln bis eine Kachelbreite hinter der nächsten, um kleine Schritte zu vermeiden
+        nearest = min(d for d, _ in outside)
+        reach = nearest + max(t[2] - t[0] for _, t in outside)
+        needed = None
+        for dist, tile in outside:
+            if dist <= reach:
+                needed = _union(needed, tile)
+        return needed
+
+    def tiles_outside(self, value):
+        """
+        Fenster (Gesamtbild-Koordinaten), das alle Kacheln mit Pixeln >= value außerhalb des geladenen
+        Fensters enthält; () wenn es keine gibt, None wenn die Quelle keine Kachel-Maxima kennt.
+        """
+        if self.is_full:
+            return ()
+        if not hasattr(self.source, "higher_tile_windows"):
+            return None
+        needed = None
+        for tile in self.source.higher_tile_windows(value, inclusive=True):
+            if _union(tile, self.window) != self.window:
+                needed = _union(needed, tile)
+        return needed or ()
+
+    def flood_bound(self, x, y, saddle):
+        """
+        Fenster (Gesamtbild-Koordinaten), außerhalb dessen kein Pfad den Sattel über saddle heben kann.
+        Ein solcher Pfad besteht nur aus Pixeln über saddle, läuft also nur durch Kacheln mit
+        Maximum über saddle, die (4-Nachbarschaft) mit der Kachel des Startpixels zusammenhängen.
+        None, wenn die Quelle keine Kachel-Maxima kennt.
+        """
+        tile_max = getattr(self.source, "tile_raw_max", None)
+        if tile_max is None:
+            return None
+        ts = self.source.tile_size
+        rows, cols = self.shape
+        gx, gy = x + self.window[0], y + self.window[1]
+        labels, _ = label(tile_max > saddle)
+        own = labels[gy // ts, gx // ts]
+        if own == 0:  # Startpixel nicht höher als der Sattel: kein besserer Pfad möglich
+            tys, txs = np.array([gy // ts]), np.array([gx // ts])
+        else:
+            tys, txs = np.nonzero(labels == own)
+        return (int(txs.min()) * ts, int(tys.min()) * ts,
+                min(cols, (int(txs.max()) + 1) * ts), min(rows, (int(tys.max()) + 1) * ts))
+
+    def candidates(self, border_width):
+        """Lokale Maxima wie find_local_maxima, ohne die Randzone des Filters an offenen Rändern."""
+        max_out = running_max_filter(self.data, self.neighbourhood_size)
+        local_max = max_out == self.data
+        # Minimum des gesamten DEMs (nach dem Ausschließen des Randes) ausschließen, wie find_local_maxima
+        local_max[self.data == _candidate_minimum(self.source, border_width)] = False
+
+        bx0, by0, bx1, by1 = self.valid_box(self.filter_radius)
+        valid = np.zeros_like(local_max)
+        valid[by0:by1, bx0:bx1] = True
+        yx = np.argwhere(local_max & valid)
+        return yx[:, ::-1].astype(np.int64)  # (x, y) im Fenster
+
+
+def _analyse_window(ctx, contains, prominence_threshold, dominance_threshold, orographic_threshold,
+                    border_width, min_height, accuracy, row_scales=None, max_window_pixels=None):
+    """
+    Führt die Gipfelanalyse für alle Kandidaten der ROI im geladenen Fenster aus.
+    :param max_window_pixels: größtes Fenster für die exakte Sattelsuche; Gipfel, die mehr bräuchten,
+                              werden mit der Sattelsuche der Stufe "bounded" berechnet (zählt ctx.capped)
+    :return: (Gipfelliste, None) wenn alle Ergebnisse gesichert sind,
+             sonst (None, benötigtes Fenster in Gesamtbild-Koordinaten)
+    """
+    data = ctx.data
+    wx0, wy0 = ctx.window[0], ctx.window[1]
+    coords = ctx.candidates(border_width)
+    if not len(coords):
+        return [], None
+
+    heights = data[coords[:, 1], coords[:, 0]].astype(np.int64)
+    order = np.argsort(-heights, kind="stable")  # wie calculate_prominent_peaks: gleich hohe Gipfel in (y, x)-Reihenfolge
+    coords = coords[order]
+    heights = heights[order]
+    nearest = compute_nearest_higher(coords, heights)
+    in_roi = contains(coords[:, 0] + wx0, coords[:, 1] + wy0)
+
+    needed = None
+    peaks = []
+    for i in np.flatnonzero(in_roi):
+        x, y = int(coords[i, 0]), int(coords[i, 1])
+        h = heights[i]
+        j = nearest[i]
+
+        # Nearest-Higher: alle Kandidaten im Umkreis müssen bekannt sein
+        if j == -1:
+            if not ctx.is_full:
+                # Kennt die Quelle Kachel-Maxima, reicht es, die Kacheln mit höheren Pixeln nachzuladen;
+                # gibt es keine, ist der Kandidat auch im Gesamtbild der höchste
+                higher = ctx.higher_outside(x, y, h)
+                if higher is None:
+                    needed = _union(needed, _grow_window(ctx.window, ctx.shape))
+                    continue
+                if higher:
+                    needed = _union(needed, higher)
+                    continue
+            prom = h
+        else:
+            tx, ty = int(coords[j, 0]), int(coords[j, 1])
+            dist = np.hypot(tx - x, ty - y)
+            if not ctx.covers_disc(x, y, dist, ctx.filter_radius):
+                needed = _union(needed, ctx.disc_window(x, y, dist, ctx.filter_radius))
+                continue
+
+            # Sattel erst mit Bresenham-Approximation
+            path = get_path_between_points((x, y), (tx, ty))
+            saddle_h = min(data[yy, xx] for xx, yy in path)
+            if h - saddle_h < prominence_threshold:
+                continue
+
+            use_bounded = accuracy == "bounded"
+            if accuracy == "exact":
+                saddle_h, escaped = get_maxmin_saddle_in_window(data, (x, y), (tx, ty), ctx.open_edges)
+                # Der Sattel im Fenster ist eine untere Schranke des exakten Sattels
+                if h - saddle_h < prominence_threshold:
+                    continue
+                if escaped:
+                    # Mit Kachel-Maxima nur bis zu den Kacheln vergrößern, über die ein besserer Pfad laufen könnte;
+                    # liegen die alle im Fenster, ist der Sattel bereits exakt
+                    bound = ctx.flood_bound(x, y, saddle_h)
+                    if bound is None:
+                        bound = _grow_window(ctx.window, ctx.shape)
+                    if _union(bound, ctx.window) != ctx.window:
+                        if max_window_pixels is None or \
+                                _area(_union(_union(needed, ctx.window), bound)) <= max_window_pixels:
+                            needed = _union(needed, bound)
+                            continue
+                        # Exaktes Fenster wäre zu groß: Sattel wie Stufe "bounded", aber nicht unter dem
+                        # Sattel im Fenster (beides untere Schranken, Prominenz evtl. überschätzt)
+                        use_bounded = True
+                        ctx.capped += 1
+            if use_bounded:
+                bounded_box = bounded_search_box((x + wx0, y + wy0), (tx + wx0, ty + wy0), ctx.shape)
+                if _union(bounded_box, ctx.window) != ctx.window:
+                    needed = _union(needed, bounded_box)
+                    continue
+                bounded_saddle = get_maxmin_saddle_bounded(data, (x, y), (tx, ty))
+                saddle_h = bounded_saddle if accuracy == "bounded" else max(saddle_h, bounded_saddle)
+            prom = int(h - saddle_h)
+            if prom < prominence_threshold:
+                continue
+
+        if h < min_height:
+            continue
+        if calculate_orographic_dominance(h, prom) < orographic_threshold:
+            continue
+
+        # Dominanz wie filter_peaks: unendlich nur für den ersten Gipfel in (-h, y, x)-Reihenfolge;
+        # gleich hohe spätere Gipfel erhalten den Abstand zum nächsten Pixel >= h
+        dominance = None
+        if j == -1:
+            tied = ctx.tiles_outside(h)  # alle Pixel >= h müssen geladen sein
+            if tied is None:
+                needed = _union(needed, _grow_window(ctx.window, ctx.shape))
+                continue
+            if tied:
+                needed = _union(needed, tied)
+                continue
+            tys, txs = np.nonzero(data >= h)
+            if not np.any((tys < y) | ((tys == y) & (txs < x))):
+                dominance = np.inf
+
+        # Dominanz: nächster höherer Pixel muss im geladenen Fenster liegen
+        if dominance is None:
+            if np.count_nonzero(data >= data[y, x]) <= 1:  # kein höherer Pixel im Fenster
+                needed = _union(needed, _grow_window(ctx.window, ctx.shape))
+                continue
+            if row_scales is None:
+                dominance = radius = calculate_dominance_distance((x, y), data)
+            else:
+                # Dominanz in Metern; Kreis in Pixeln über die Zeilentabelle abschätzen
+                dominance = calculate_dominance_metric((x, y), data, row_scales, row_offset=wy0)
+                radius = max(row_scales.pixel_extent(y + wy0, dominance))
+            if not ctx.covers_disc(x, y, radius):
+                needed = _union(needed, ctx.disc_window(x, y, radius))
+                continue
+        if dominance >= dominance_threshold:
+            peaks.append(((x + wx0, y + wy0), int(h), int(prom), dominance))
+
+    if needed is not None:
+        return None, _union(needed, ctx.window)
+    peaks.sort(key=_peak_order)
+    return peaks, None
+
+
+def find_peaks_in_roi(source, roi, prominence_threshold_val=500, dominance_threshold_val=100,
+                      orographic_dominence_threshold_val=0, border_width=50, min_height=0,
+                      accuracy="exact", context_margin=64, neighbourhood_size=2 * FILTER_RADIUS + 1, row_scales=None,
+                      max_window_fraction=None):
+    """
+    Findet die Gipfel innerhalb einer ROI, liest dabei aber nur die ROI plus den nötigen Kontext.
+    Das Ergebnis entspricht find_peaks auf dem gesamten DEM, beschränkt auf die ROI: reicht die
+    Nearest-Higher-Suche, die Sattelsuche oder die Dominanz über das geladene Fenster hinaus,
+    wird das Fenster vergrößert und die Analyse wiederholt.
+    Gibt eine Liste [(x, y), Höhe, Prominenz, Dominanz] in Pixelkoordinaten des Gesamtbildes zurück.
+    :param source: Pfad zur GeoTIFF-Datei oder CompressedTileStore
+    :param roi: Rechteck (x0, y0, x1, y1) oder Polygon [(x, y), ...] in Pixelkoordinaten
+    :param context_margin: anfänglicher Kontextrand um die ROI in Pixeln
+    :param max_window_fraction: größter Anteil des DEMs, den die exakte Sattelsuche laden darf (None: unbegrenzt).
+                                Gipfel, die mehr bräuchten, erhalten den Sattel wie in Stufe "bounded";
+                                ihre Prominenz kann dann überschätzt sein.
+    Übrige Parameter wie find_peaks.
+    """
+    check_accuracy(accuracy)
+
+    (x0, y0, x1, y1), contains = roi_bounds(roi)
+    source = _as_source(source)
+    shape = source.shape
+    max_window_pixels = None if max_window_fraction is None else int(max_window_fraction * shape[0] * shape[1])
+    context_margin = max(context_margin, _filter_radius(neighbourhood_size))
+    window = _clip_window((x0 - context_margin, y0 - context_margin, x1 + context_margin, y1 + context_margin), shape)
+
+    while True:
+        ctx = _WindowContext(source, window, border_width, neighbourhood_size)
+        print(f"ROI-Analyse: Fenster {window} ({ctx.data.shape[1]}x{ctx.data.shape[0]} von {shape[1]}x{shape[0]} Pixeln)")
+        peaks, needed = _analyse_window(ctx, contains, prominence_threshold_val, dominance_threshold_val,
+                                        orographic_dominence_threshold_val, border_width, min_height, accuracy,
+                                        row_scales, max_window_pixels)
+        if peaks is not None:
+            if ctx.capped:
+                print(f"Warnung: {ctx.capped} Kandidaten mit begrenzter Sattelsuche (exakte Suche bräuchte mehr "
+                      f"als {max_window_fraction:.0%} des DEMs), Prominenz evtl. überschätzt")
+            print(f"Anzahl Gipfel in ROI: {len(peaks)}")
+            return peaks
+        if needed == window:  # Absicherung: Fenster muss in jedem Schritt wachsen
+            needed = _grow_window(window, shape)
+        window = needed
+
+
+def find_peaks_blockwise(source, block_size=512, prominence_threshold_val=500, dominance_threshold_val=100,
+                         orographic_dominence_threshold_val=0, border_width=50, min_height=0, accuracy="exact",
+                         context_margin=64, neighbourhood_size=2 * FILTER_RADIUS + 1, row_scales=None,
+                         max_window_fraction=MAX_WINDOW_FRACTION):
+    """
+    Findet alle Gipfel des DEMs, indem es in Blöcke zerlegt und jeder Block als ROI analysiert wird.
+    Entpackt wird je Block nur der Block plus der nötige Kontext. Bei einem CompressedTileStore wächst
+    der Kontext über die Kachel-Maxima nur bis zu den Kacheln, die das Ergebnis beeinflussen können.
+    Für sehr prominente Gipfel bräuchte die exakte Sattelsuche trotzdem oft fast das ganze DEM; sie ist
+    deshalb auf max_window_fraction begrenzt, darüber wird der Sattel wie in Stufe "bounded" gesucht
+    (Prominenz evtl. überschätzt, mit Warnung). Mit max_window_fraction=None entspricht das Ergebnis
+    find_peaks auf dem gesamten DEM, auch in der Reihenfolge.
+    Das größte gelesene Fenster meldet CompressedTileStore.metrics() als peak_window_pixels.
+    Gibt eine Liste [(x, y), Höhe, Prominenz, Dominanz] absteigend nach Höhe zurück.
+    :param source: Pfad zur GeoTIFF-Datei oder CompressedTileStore
+    :param block_size: Kantenlänge der Blöcke in Pixeln
+    Übrige Parameter wie find_peaks_in_roi.
+    """
+    source = _as_source(source)
+    rows, cols = source.shape
+    peaks = []
+    for y0 in range(0, rows, block_size):
+        for x0 in range(0, cols, block_size):
+            peaks += find_peaks_in_roi(source, (x0, y0, min(cols, x0 + block_size), min(rows, y0 + block_size)),
+                                       prominence_threshold_val, dominance_threshold_val,
+                                       orographic_dominence_threshold_val, border_width, min_height,
+                                       accuracy, context_margin, neighbourhood_size, row_scales, max_window_fraction)
+    peaks.sort(key=_peak_order)
+    print(f"Anzahl Gipfel (blockweise): {len(peaks)}")
+    return peaks
+
+
+if __name__ == "__main__":
+    from reader import read_dem
+    from peak_analysis import find_peaks
+    from tile_store import CompressedTileStore
+
+    # Kilimandscharo: drei gleich hohe Gipfelpixel (5880 m); nur der erste in (y, x)-Reihenfolge
+    # erhält wie in find_peaks unendliche Dominanz
+    dem_path = "images/Kilimandjaro.tif"
+    dem = read_dem(dem_path)[0]
+    store = CompressedTileStore.from_array(dem, tile_size=128)
+    roi = (380, 50, 470, 130)
+    for prominence, dominance in [(100, 20), (300, 0), (2000, 2000)]:
+        expected = find_peaks(dem.copy(), prominence, dominance)
+        assert find_peaks_blockwise(store, prominence_threshold_val=prominence, dominance_threshold_val=dominance,
+                                    max_window_fraction=None) == expected, \
+            f"Kachelspeicher weicht ab bei {(prominence, dominance)}"
+        expected_roi = [p for p in expected if roi[0] <= p[0][0] < roi[2] and roi[1] <= p[0][1] < roi[3]]
+        assert find_peaks_in_roi(dem_path, roi, prominence, dominance) == expected_roi, \
+            f"ROI-Analyse weicht ab bei {(prominence, dominance)}"
+    print("Blockweise und ROI-Analyse stimmen mit find_peaks überein (auch bei gleich hohen Gipfeln).")
+
+    # Mit begrenztem Fenster der exakten Sattelsuche: Sattel nie über dem exakten, Prominenz höchstens überschätzt
+    store.reset_metrics()
+    expected = {p[0]: p[2] for p in find_peaks(dem.copy(), 300, 0)}
+    for xy, _, prom, _ in find_peaks(store, 300, 0):
+        assert xy not in expected or prom >= expected[xy], f"Prominenz von {xy} unterschätzt"
+    assert store.metrics()["peak_window_fraction"] < 1, "Kachelspeicher hat das gesamte DEM gelesen"
+    store.print_metrics()
@@ -0,0 +1,160 @@
+import time
+import numpy as np
+
+from peak_analysis import (
+    calculate_orographic_dominance,
+    calculate_prominent_peaks,
+    check_accuracy,
+    dominance_function,
+    find_local_maxima,
+)
+
+
+class SweepResult:
+    """
+    Ergebnis eines Schwellenwert-Sweeps.
+    Je Gipfel (absteigend nach Höhe) die Werte, bis zu denen er die einzelnen Filter übersteht,
+    sowie die Anzahl überlebender Gipfel für jede Kombination des Schwellenwert-Gitters.
+    """
+
+    def __init__(self, coords, heights, prominences, prominence_limits, dominances,
+                 prominence_values, dominance_values, min_height_values, dominance_unit="px"):
+        self.coords = coords                        # (n, 2) Pixelkoordinaten (x, y)
+        self.heights = heights                      # Höhe, zugleich höchste überstandene Mindesthöhe
+        self.prominences = prominences              # Prominenz wie von find_peaks gemeldet
+        self.prominence_limits = prominence_limits  # höchste überstandene Prominenz-Schwelle
+        self.dominances = dominances                # Dominanz (Pixel bzw. m), zugleich höchste überstandene Schwelle
+        self.prominence_values = prominence_values
+        self.dominance_values = dominance_values
+        self.min_height_values = min_height_values
+        self.dominance_unit = dominance_unit        # "px" oder "m" (mit row_scales)
+
+        # Anzahl überlebender Gipfel: counts[Prominenz, Dominanz, Mindesthöhe]
+        p_ok = (prominence_limits[None, :] >= prominence_values[:, None]).astype(np.int64)
+        d_ok = (dominances[None, :] >= dominance_values[:, None]).astype(np.int64)
+        h_ok = (heights[None, :] >= min_height_values[:, None]).astype(np.int64)
+        self.counts = np.einsum("pn,dn,hn->pdh", p_ok, d_ok, h_ok)
+
+    def __len__(self):
+        return len(self.heights)
+
+    def survivors(self, prominence_threshold, dominance_threshold, min_height=0, orographic_threshold=0):
+        """
+        Gibt die Gipfel zurück, die find_peaks mit diesen Schwellenwerten liefern würde:
+        [(x, y), Höhe, Prominenz, Dominanz], absteigend nach Höhe.
+        Die Schwellenwerte müssen nicht auf dem Gitter liegen, die Prominenz aber >= der kleinsten Gitter-Prominenz.
+        """
+        if prominence_threshold < self.prominence_values.min():
+            raise ValueError(f"Prominenz-Schwelle {prominence_threshold} liegt unter dem Sweep-Minimum {self.prominence_values.min()}")
+        mask = ((self.prominence_limits >= prominence_threshold) & (self.dominances >= dominance_threshold) &
+                (self.heights >= min_height))
+        peaks = []
+        for i in np.flatnonzero(mask):
+            h, prom = int(self.heights[i]), int(self.prominences[i])
+            if calculate_orographic_dominance(h, prom) < orographic_threshold:
+                continue
+            peaks.append(((int(self.coords[i, 0]), int(self.coords[i, 1])), h, prom, self.dominances[i]))
+        return peaks
+
+    def prominence_curve(self, dominance_index=0, min_height_index=0):
+        """Sensitivitätskurve: Anzahl Gipfel über den Prominenz-Schwellen bei fester Dominanz/Mindesthöhe."""
+        return self.prominence_values, self.counts[:, dominance_index, min_height_index]
+
+    def dominance_curve(self, prominence_index=0, min_height_index=0):
+        """Sensitivitätskurve: Anzahl Gipfel über den Dominanz-Schwellen bei fester Prominenz/Mindesthöhe."""
+        return self.dominance_values, self.counts[prominence_index, :, min_height_index]
+
+
+def sweep_thresholds(dem_data, prominence_values, dominance_values, min_height_values=(0,), border_width=50,
+                     accuracy="exact", saddle_cache=None, neighbourhood_size=7, row_scales=None):
+    """
+    Berechnet in einer einzigen Analyse, welche Gipfel für ein ganzes Gitter aus
+    Prominenz × Dominanz × Mindesthöhe übrig bleiben (Semantik wie find_peaks).
+    Sattelsuche und Dominanz werden nur einmal für die kleinste Prominenz- und Mindesthöhen-Schwelle
+    berechnet; jede größere Schwelle ist dann ein reiner Vergleich.
+    :param dem_data: 2D-Array der Höhenwerte (DEM-Daten)
+    :param prominence_values: Prominenz-Schwellen (m)
+    :param dominance_values: Dominanz-Schwellen (wie dominance_threshold_val in find_peaks: Pixel, mit row_scales Meter)
+    :param min_height_values: Mindesthöhen (m)
+    :param border_width: Breite des Randes, der ausgeschlossen wird
+    :param accuracy: Genauigkeitsstufe der Prominenz (siehe ACCURACY_TIERS)
+    :param saddle_cache: Optionaler SaddleCache
+    :param neighbourhood_size: Fenstergröße der lokalen Maxima in Pixeln (wie in find_peaks)
+    :param row_scales: Optionaler RowScaleTable (geo_utils); dann wird die Dominanz wie in find_peaks in Metern berechnet
+    :return: SweepResult
+    """
+    check_accuracy(accuracy)
+    prominence_values = np.sort(np.asarray(prominence_values, dtype=np.float64))
+    dominance_values = np.sort(np.asarray(dominance_values, dtype=np.float64))
+    min_height_values = np.sort(np.asarray(min_height_values, dtype=np.float64))
+    dominance_func = dominance_function(row_scales)
+
+    candidate_peaks_yx = find_local_maxima(dem_data, border_width, neighbourhood_size)
+    candidate_peaks_xy_list = [(c, r) for r, c in candidate_peaks_yx]
+    prominent_peaks_info = calculate_prominent_peaks(candidate_peaks_xy_list, dem_data, prominence_values[0],
+                                                     use_dijkstra=accuracy != "line", bounded_search=accuracy == "bounded",
+                                                     saddle_cache=saddle_cache, with_line_prominence=True,
+                                                     with_exact_prominence=True)
+
+    # Reihenfolge wie in find_peaks; der höchste Gipfel hat unendliche Dominanz
+    sorted_peaks = sorted(prominent_peaks_info, key=lambda p: -p[1])
+    coords, heights, prominences, limits, dominances = [], [], [], [], []
+    for i, (peak_xy, peak_h, prominence, line_prominence, exact_prominence) in enumerate(sorted_peaks):
+        if peak_h < min_height_values[0]:
+            continue
+        coords.append(peak_xy)
+        heights.append(peak_h)
+        prominences.append(prominence)
+        # find_peaks filtert erst mit der Bresenham-Prominenz, dann mit der genauen (ungerundeten)
+        limits.append(min(line_prominence, exact_prominence) if accuracy != "line" else line_prominence)
+        dominances.append(np.inf if i == 0 else dominance_func(peak_xy, dem_data))
+
+    print(f"Sweep: {len(heights)} Gipfel, Gitter {len(prominence_values)}×{len(dominance_values)}×{len(min_height_values)}")
+    return SweepResult(np.array(coords, dtype=np.int64).reshape(-1, 2), np.array(heights, dtype=np.int64),
+                       np.array(prominences, dtype=np.int64), np.array(limits, dtype=np.float64),
+                       np.array(dominances, dtype=np.float64),
+                       prominence_values, dominance_values, min_height_values,
+                       dominance_unit="m" if row_scales is not None else "px")
+
+
+def plot_sensitivity_curves(result, ax=None, min_height_index=0):
+    """
+    Zeichnet je Dominanz-Schwelle die Anzahl Gipfel über der Prominenz-Schwelle.
+    :param result: SweepResult
+    :param ax: Matplotlib-Axes; wenn None, wird eine neue Figure erzeugt
+    :return: das verwendete Axes-Objekt
+    """
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        _, ax = plt.subplots()
+    for d_idx, dominance in enumerate(result.dominance_values):
+        values, counts = result.prominence_curve(d_idx, min_height_index)
+        ax.plot(values, counts, marker="o", label=f"Dominanz ≥ {dominance:g} {result.dominance_unit}")
+    ax.set_xlabel("Prominenz-Schwelle (m)")
+    ax.set_ylabel("Anzahl Gipfel")
+    ax.set_title(f"Mindesthöhe {result.min_height_values[min_height_index]:g} m")
+    ax.legend()
+    return ax
+
+
+if __name__ == "__main__":
+    from reader import read_dem
+    from peak_analysis import find_peaks
+
+    dem = read_dem("images/Valais.tif")[0]
+    prominence_grid = [30, 100, 200, 300, 500]
+    dominance_grid = [0, 10, 20, 50, 100]
+    height_grid = [0, 3000, 4000]
+
+    start_time = time.time()
+    sweep = sweep_thresholds(dem, prominence_grid, dominance_grid, height_grid)
+    print(f"Sweep-Dauer: {time.time() - start_time:.2f} Sekunden")
+    print("Anzahl Gipfel (Zeilen: Prominenz, Spalten: Dominanz) bei Mindesthöhe 0 m:")
+    print(sweep.counts[:, :, 0])
+
+    # Stichprobe gegen einzelne find_peaks-Aufrufe
+    for prom, dom, min_h in [(100, 20, 0), (300, 50, 3000)]:
+        expected = find_peaks(dem, prom, dom, min_height=min_h)
+        assert sweep.survivors(prom, dom, min_h) == expected, f"Sweep weicht ab bei {(prom, dom, min_h)}"
+    print("Stichprobe stimmt mit find_peaks überein.")
@@ -0,0 +1,445 @@
+import argparse
+import glob
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import rasterio
+
+from peak_analysis import (
+    ACCURACY_TIERS,
+    calculate_prominent_peaks,
+    check_accuracy,
+    dominance_function,
+    filter_peaks,
+    neighbourhood_size,
+    running_max_filter,
+)
+from geo_utils import RowScaleTable, calculate_pixels_per_meter
+from reader import read_dem_mosaic
+
+# Stufen je Kachel, in Ausführungsreihenfolge; jede Stufe liest den Checkpoint der vorherigen
+STAGES = ("candidates", "prominence", "dominance")
+
+MANIFEST_NAME = "manifest.json"
+
+DEFAULT_PARAMS = {
+    "prominence": 500,
+    "dominance_m": 2000,
+    "orographic": 0,
+    "min_height": 0,
+    "border_width": 50,
+    "accuracy": "exact",
+    "neighbourhood_m": None,  # Umgebungsradius der lokalen Maxima in m; None = 7x7 Pixel
+    "halo_px": 256,           # Überlappung in Pixeln, die je Kachel aus den Nachbarkacheln mitgelesen wird
+}
+
+
+def checkpoint_path(workdir, tile_id, stage):
+    """Pfad des Checkpoints einer Stufe einer Kachel."""
+    return os.path.join(workdir, tile_id, f"{stage}.npz")
+
+
+def _save_npz_atomic(path, **arrays):
+    """Schreibt ein .npz so, dass nach einem Absturz nie ein halber Checkpoint liegen bleibt."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def tile_layout(tile_paths, halo):
+    """
+    Bestimmt für jede Kachel das Lesefenster mit Überlappung (Halo) im gemeinsamen Pixelraster.
+    Die Region ist das umschließende Rechteck aller Kacheln; das Fenster wird auf sie beschnitten.
+    :param tile_paths: {Kachel: Pfad}
+    :param halo: Überlappung in Pixeln
+    :return: {Kachel: {"window": (x0, y0, x1, y1) relativ zur Kachel (x1, y1 exklusiv),
+                        "neighbours": [Pfade der berührten Nachbarkacheln],
+                        "region_edges": (links, oben, rechts, unten) – Fensterseiten am Rand der Region}}
+    """
+    rects = {}
+    ref = None
+    for tile_id, path in tile_paths.items():
+        with rasterio.open(path) as src:
+            if ref is None:
+                ref = src.transform
+            gx = int(round((src.transform.c - ref.c) / ref.a))
+            gy = int(round((src.transform.f - ref.f) / ref.e))
+            rects[tile_id] = (gx, gy, gx + src.width, gy + src.height)
+    if not rects:
+        return {}
+    region = (min(r[0] for r in rects.values()), min(r[1] for r in rects.values()),
+              max(r[2] for r in rects.values()), max(r[3] for r in rects.values()))
+
+    layout = {}
+    for tile_id, (x0, y0, x1, y1) in rects.items():
+        window = (max(region[0], x0 - halo), max(region[1], y0 - halo),
+                  min(region[2], x1 + halo), min(region[3], y1 + halo))
+        neighbours = [tile_paths[other] for other, r in rects.items() if other != tile_id and
+                      r[0] < window[2] and window[0] < r[2] and r[1] < window[3] and window[1] < r[3]]
+        layout[tile_id] = {
+            "window": (window[0] - x0, window[1] - y0, window[2] - x0, window[3] - y0),
+            "neighbours": neighbours,
+            "region_edges": tuple(bool(window[i] == region[i]) for i in range(4)),
+        }
+    return layout
+
+
+def _zero_region_edges(dem, region_edges, width):
+    """Setzt den Rand wie set_image_borders_to_zero, aber nur an Fensterseiten, die am Rand der Region liegen."""
+    left, top, right, bottom = region_edges
+    if width <= 0:
+        return dem
+    if left:
+        dem[:, :width] = 0
+    if top:
+        dem[:width, :] = 0
+    if right:
+        dem[:, -width:] = 0
+    if bottom:
+        dem[-width:, :] = 0
+    return dem
+
+
+def run_stage(stage, tile_path, workdir, tile_id, params, layout=None):
+    """
+    Führt eine Stufe für eine Kachel aus und schreibt ihren Checkpoint (läuft im Worker-Prozess).
+    Gelesen wird die Kachel samt Halo aus den Nachbarkacheln (siehe tile_layout); der Rand wird nur am
+    Rand der Region ausgeschlossen. Zwischenstände liegen in Fensterkoordinaten, das Endergebnis enthält
+    nur Gipfel der Kachel selbst, in Pixelkoordinaten der Kachel.
+    :param layout: Eintrag aus tile_layout; None = Kachel ohne Halo, wie find_peaks je Datei
+    :return: Kurzbeschreibung des Ergebnisses für das Manifest
+    """
+    with rasterio.open(tile_path) as src:
+        tile_width, tile_height = src.width, src.height
+    if layout is None:
+        layout = {"window": (0, 0, tile_width, tile_height), "neighbours": [], "region_edges": (True,) * 4}
+    wx0, wy0, wx1, wy1 = layout["window"]
+    dem, crs, transform, resolution = read_dem_mosaic([tile_path] + list(layout["neighbours"]),
+                                                      wx0, wy0, wx1 - wx0, wy1 - wy0)
+    # Rand wie in find_local_maxima ausschließen, aber nicht an den Nahtstellen zu Nachbarkacheln
+    dem = _zero_region_edges(dem, layout["region_edges"], params["border_width"])
+    out_path = checkpoint_path(workdir, tile_id, stage)
+
+    if stage == "candidates":
+        size = 7
+        if params.get("neighbourhood_m"):
+            size = neighbourhood_size(params["neighbourhood_m"],
+                                      calculate_pixels_per_meter(crs, resolution, transform.c, transform.f))
+        local_max = running_max_filter(dem, size) == dem
+        local_max[dem == min(np.min(dem), 0)] = False  # Minima bzw. ausgeschlossenen Rand überspringen
+        candidates_yx = np.argwhere(local_max)
+        _save_npz_atomic(out_path, coords_yx=candidates_yx.astype(np.int64))
+        return f"{len(candidates_yx)} Kandidaten"
+
+    # Pixel der Kachel selbst im Fenster; Kandidaten im Halo dienen nur als höhere Nachbarn
+    def in_tile(x, y):
+        return -wx0 <= x < tile_width - wx0 and -wy0 <= y < tile_height - wy0
+
+    if stage == "prominence":
+        with np.load(checkpoint_path(workdir, tile_id, "candidates")) as data:
+            candidates_xy = [(c, r) for r, c in data["coords_yx"]]
+        accuracy = params["accuracy"]
+        peaks = calculate_prominent_peaks(candidates_xy, dem, params["prominence"],
+                                          use_dijkstra=accuracy != "line", bounded_search=accuracy == "bounded")
+        _save_npz_atomic(out_path,
+                         coords_xy=np.array([xy for xy, _, _ in peaks], dtype=np.int64).reshape(-1, 2),
+                         heights=np.array([h for _, h, _ in peaks], dtype=np.int64),
+                         prominences=np.array([p for _, _, p in peaks], dtype=np.int64))
+        own = sum(1 for xy, _, _ in peaks if in_tile(*xy))
+        return f"{own} prominente Gipfel ({len(peaks) - own} im Halo)"
+
+    if stage == "dominance":
+        with np.load(checkpoint_path(workdir, tile_id, "prominence")) as data:
+            prominent = [((int(x), int(y)), int(h), int(p))
+                         for (x, y), h, p in zip(data["coords_xy"], data["heights"], data["prominences"])]
+        # Nur Gipfel der Kachel filtern; der höchste Gipfel im Halo bleibt dabei, falls er höher ist,
+        # damit nur ein auch im Halo höchster Gipfel unendliche Dominanz erhält
+        own = [peak for peak in prominent if in_tile(*peak[0])]
+        if prominent and not in_tile(*prominent[0][0]):
+            own.insert(0, prominent[0])
+        try:
+            row_scales = RowScaleTable.from_transform(crs, transform, dem.shape[0])
+        except Exception as e:
+            print(f"Fehler Meter↔Pixel für {tile_id}: {e}. Dominanz wird in Pixeln verwendet.")
+            row_scales = None
+        peaks = filter_peaks(own, dem, params["dominance_m"], params["orographic"], params["min_height"],
+                             dominance_func=dominance_function(row_scales))
+        peaks = [((x + wx0, y + wy0), h, p, d) for (x, y), h, p, d in peaks if in_tile(x, y)]
+        _save_npz_atomic(out_path,
+                         coords_xy=np.array([xy for xy, _, _, _ in peaks], dtype=np.int64).reshape(-1, 2),
+                         heights=np.array([h for _, h, _, _ in peaks], dtype=np.int64),
+                         prominences=np.array([p for _, _, p, _ in peaks], dtype=np.int64),
+                         dominances_m=np.array([d for _, _, _, d in peaks], dtype=np.float64))
+        return f"{len(peaks)} Gipfel"
+
+    raise ValueError(f"Unbekannte Stufe '{stage}'")
+
+
+class TileJobScheduler:
+    """
+    Lokaler Job-Scheduler für die Gipfelanalyse vieler DEM-Kacheln.
+    Jede Kachel wird in die Stufen aus STAGES zerlegt; jede Stufe schreibt einen Checkpoint
+    nach workdir/<Kachel>/<Stufe>.npz. Ein erneuter Aufruf von run() setzt nach einem Abbruch
+    dort fort, wo Checkpoints fehlen. Fortschritt, Durchsatz und geschätzte Restzeit stehen
+    in workdir/manifest.json.
+    Jede Kachel wird mit einem Halo aus ihren Nachbarn gelesen (params["halo_px"], siehe tile_layout),
+    damit an den Nahtstellen weder Kandidaten wegfallen noch Sattel und höhere Nachbarn fehlen.
+    Alle Kacheln müssen dasselbe CRS und Pixelraster haben.
+    """
+
+    def __init__(self, tile_paths, workdir, params=None, workers=None):
+        self.workdir = workdir
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        check_accuracy(self.params["accuracy"])
+        self.workers = workers or os.cpu_count() or 1
+
+        self.tiles = {}
+        for path in tile_paths:
+            tile_id = os.path.splitext(os.path.basename(path))[0]
+            if tile_id in self.tiles:
+                raise ValueError(f"Kachelname '{tile_id}' ist nicht eindeutig ({path}, {self.tiles[tile_id]})")
+            self.tiles[tile_id] = os.path.abspath(path)
+        self.layout = tile_layout(self.tiles, int(self.params["halo_px"]))
+
+        self.manifest_path = os.path.join(workdir, MANIFEST_NAME)
+        self.tasks = {}
+        self._started = None
+        self._completed_this_run = 0
+
+    # --- Manifest ---
+
+    def _load_state(self):
+        """Liest ein vorhandenes Manifest und bestimmt den Status jeder Aufgabe aus den Checkpoints."""
+        os.makedirs(self.workdir, exist_ok=True)
+        previous = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("params") != self.params:
+                raise ValueError(f"Parameter weichen vom bestehenden Lauf in {self.workdir} ab: "
+                                 f"{manifest.get('params')} != {self.params}")
+            previous = manifest.get("tasks", {})
+            previous_layout = manifest.get("layout", {})
+        else:
+            previous_layout = {}
+
+        for tile_id in self.tiles:
+            # Checkpoints liegen in Fensterkoordinaten und hängen von Halo und Nachbarn ab:
+            # hat sich die Lage der Kachel geändert (andere Kachelmenge, anderer Halo), neu rechnen
+            if previous_layout.get(tile_id) != self._layout_entry(tile_id):
+                stale = [stage for stage in STAGES if os.path.exists(checkpoint_path(self.workdir, tile_id, stage))]
+                if stale:
+                    print(f"Fenster oder Nachbarn von {tile_id} haben sich geändert, verwerfe Checkpoints: {', '.join(stale)}")
+                for stage in stale:
+                    os.remove(checkpoint_path(self.workdir, tile_id, stage))
+            for stage in STAGES:
+                key = f"{tile_id}:{stage}"
+                task = dict(previous.get(key, {}))
+                if os.path.exists(checkpoint_path(self.workdir, tile_id, stage)):
+                    task["status"] = "done"
+                else:
+                    task = {"status": "pending"}  # auch abgebrochene ("running") oder fehlgeschlagene Aufgaben
+                self.tasks[key] = task
+
+    def _layout_entry(self, tile_id):
+        """Lage einer Kachel, wie sie im Manifest steht (JSON-Form, zum Vergleich beim Fortsetzen)."""
+        ids = {path: other for other, path in self.tiles.items()}
+        entry = self.layout[tile_id]
+        return {
+            "window": list(entry["window"]),
+            "halo": int(self.params["halo_px"]),
+            "region_edges": list(entry["region_edges"]),
+            "neighbours": sorted(ids[path] for path in entry["neighbours"]),
+        }
+
+    def progress(self):
+        """Fortschritt, Durchsatz und geschätzte Restzeit der laufenden Sitzung."""
+        total = len(self.tasks)
+        done = sum(1 for t in self.tasks.values() if t["status"] == "done")
+        failed = sum(1 for t in self.tasks.values() if t["status"] == "failed")
+        elapsed = time.time() - self._started if self._started else 0.0
+
+        # mittlere Dauer je Stufe aus allen bisher erledigten Aufgaben
+        durations = {stage: [] for stage in STAGES}
+        for key, task in self.tasks.items():
+            if task["status"] == "done" and "seconds" in task:
+                durations[key.rsplit(":", 1)[1]].append(task["seconds"])
+        mean = {stage: float(np.mean(v)) for stage, v in durations.items() if v}
+
+        remaining = [key.rsplit(":", 1)[1] for key, t in self.tasks.items() if t["status"] in ("pending", "running")]
+        eta = None
+        if remaining and mean:
+            fallback = float(np.mean(list(mean.values())))
+            eta = sum(mean.get(stage, fallback) for stage in remaining) / self.workers
+        elif not remaining:
+            eta = 0.0
+
+        throughput = self._completed_this_run / elapsed * 3600 if elapsed > 0 else 0.0
+        return {
+            "done": done,
+            "failed": failed,
+            "total": total,
+            "percent": round(100 * done / total, 1) if total else 100.0,
+            "elapsed_seconds": round(elapsed, 1),
+            "tasks_per_hour": round(throughput, 1),
+            "mean_seconds_per_stage": {k: round(v, 2) for k, v in mean.items()},
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "estimated_completion": (time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() + eta))
+                                     if eta is not None else None),
+        }
+
+    def _write_manifest(self):
+        _write_json_atomic(self.manifest_path, {
+            "params": self.params,
+            "workers": self.workers,
+            "tiles": self.tiles,
+            "layout": {tile_id: self._layout_entry(tile_id) for tile_id in self.tiles},
+            "stages": list(STAGES),
+            "progress": self.progress(),
+            "tasks": self.tasks,
+        })
+
+    # --- Ausführung ---
+
+    def _next_stage(self, tile_id):
+        for stage in STAGES:
+            status = self.tasks[f"{tile_id}:{stage}"]["status"]
+            if status == "failed":
+                return None
+            if status != "done":
+                return stage
+        return None
+
+    def run(self):
+        """
+        Führt alle fehlenden Aufgaben auf einem Pool lokaler Worker-Prozesse aus.
+        Angefangene Kacheln werden bevorzugt fortgesetzt, damit früh vollständige Ergebnisse vorliegen.
+        :return: Dictionary {Kachel: "done" | "failed"}
+        """
+        self._load_state()
+        self._started = time.time()
+        self._completed_this_run = 0
+
+        ready = deque((tile_id, stage) for tile_id in self.tiles
+                      if (stage := self._next_stage(tile_id)) is not None)
+        print(f"Job-Scheduler: {len(self.tiles)} Kacheln, {len(ready)} offen, {self.workers} Worker")
+        self._write_manifest()
+
+        running = {}
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while ready or running:
+                while ready and len(running) < self.workers:
+                    tile_id, stage = ready.popleft()
+                    key = f"{tile_id}:{stage}"
+                    self.tasks[key] = {"status": "running", "started": time.time()}
+                    future = executor.submit(run_stage, stage, self.tiles[tile_id], self.workdir, tile_id, self.params,
+                                             self.layout[tile_id])
+                    running[future] = (tile_id, stage)
+                self._write_manifest()
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    tile_id, stage = running.pop(future)
+                    key = f"{tile_id}:{stage}"
+                    task = self.tasks[key]
+                    task["seconds"] = round(time.time() - task.pop("started"), 2)
+                    try:
+                        task["result"] = future.result()
+                        task["status"] = "done"
+                        self._completed_this_run += 1
+                        next_stage = self._next_stage(tile_id)
+                        if next_stage is not None:
+                            ready.appendleft((tile_id, next_stage))
+                    except Exception as e:
+                        task["status"] = "failed"
+                        task["error"] = f"{type(e).__name__}: {e}"
+                        print(f"Fehler in {key}: {task['error']}")
+
+                    progress = self.progress()
+                    print(f"[{progress['done']}/{progress['total']}] {key} {task['status']} "
+                          f"({task['seconds']:.1f}s), {progress['tasks_per_hour']:.0f} Aufgaben/h, "
+                          f"Rest ca. {progress['eta_seconds'] or 0:.0f}s")
+                self._write_manifest()
+        except BaseException:
+            # Abbruch: laufende Aufgaben gelten beim nächsten Start wieder als offen
+            executor.shutdown(wait=False, cancel_futures=True)
+            for tile_id, stage in running.values():
+                self.tasks[f"{tile_id}:{stage}"] = {"status": "pending"}
+            self._write_manifest()
+            raise
+        executor.shutdown()
+
+        return {tile_id: "done" if self._next_stage(tile_id) is None and
+                self.tasks[f"{tile_id}:{STAGES[-1]}"]["status"] == "done" else "failed"
+                for tile_id in self.tiles}
+
+
+def collect_results(workdir):
+    """
+    Liest die Endergebnisse aller fertigen Kacheln eines Arbeitsverzeichnisses.
+    Jeder Gipfel erscheint genau bei der Kachel, in der er liegt (Pixelkoordinaten dieser Kachel).
+    Prominenz und Dominanz sind so genau wie bei find_peaks auf der ganzen Region, solange Schlüsselsattel
+    und nächsthöheres Gelände innerhalb des Halos liegen. Reicht der Halo nicht, wird die Prominenz
+    überschätzt (höchster Gipfel im Fenster: Prominenz = Höhe) und die Dominanz ist unendlich bzw. zu groß;
+    dann params["halo_px"] erhöhen.
+    :return: {Kachel: [(x, y), Höhe, Prominenz, Dominanz in m]}
+    """
+    with open(os.path.join(workdir, MANIFEST_NAME), encoding="utf-8") as f:
+        tiles = json.load(f)["tiles"]
+    results = {}
+    for tile_id in tiles:
+        path = checkpoint_path(workdir, tile_id, STAGES[-1])
+        if not os.path.exists(path):
+            continue
+        with np.load(path) as data:
+            results[tile_id] = [((int(x), int(y)), int(h), int(p), float(d)) for (x, y), h, p, d in
+                                zip(data["coords_xy"], data["heights"], data["prominences"], data["dominances_m"])]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkpoint-fähige Gipfelanalyse über viele DEM-Kacheln")
+    parser.add_argument("workdir", help="Arbeitsverzeichnis für Checkpoints und Manifest")
+    parser.add_argument("tiles", nargs="+", help="GeoTIFF-Kacheln (Glob-Muster erlaubt)")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Worker-Prozesse (Standard: CPU-Kerne)")
+    parser.add_argument("--prominence", type=float, default=DEFAULT_PARAMS["prominence"])
+    parser.add_argument("--dominance", type=float, default=DEFAULT_PARAMS["dominance_m"], help="Mindestdominanz in m")
+    parser.add_argument("--orographic", type=float, default=DEFAULT_PARAMS["orographic"])
+    parser.add_argument("--min-height", type=float, default=DEFAULT_PARAMS["min_height"])
+    parser.add_argument("--border", type=int, default=DEFAULT_PARAMS["border_width"])
+    parser.add_argument("--accuracy", choices=list(ACCURACY_TIERS), default=DEFAULT_PARAMS["accuracy"])
+    parser.add_argument("--neighbourhood", type=float, default=DEFAULT_PARAMS["neighbourhood_m"],
+                        help="Umgebungsradius der lokalen Maxima in m (Standard: 7x7 Pixel)")
+    parser.add_argument("--halo", type=int, default=DEFAULT_PARAMS["halo_px"],
+                        help="Überlappung in Pixeln, die aus den Nachbarkacheln mitgelesen wird")
+    args = parser.parse_args()
+
+    tile_paths = sorted({p for pattern in args.tiles for p in (glob.glob(pattern) or [pattern])})
+    scheduler = TileJobScheduler(tile_paths, args.workdir, workers=args.workers, params={
+        "prominence": args.prominence,
+        "dominance_m": args.dominance,
+        "orographic": args.orographic,
+        "min_height": args.min_height,
+        "border_width": args.border,
+        "accuracy": args.accuracy,
+        "neighbourhood_m": args.neighbourhood,
+        "halo_px": args.halo,
+    })
+    status = scheduler.run()
+    results = collect_results(args.workdir)
+    print(f"Fertig: {sum(s == 'done' for s in status.values())}/{len(status)} Kacheln, "
+          f"{sum(len(p) for p in results.values())} Gipfel")
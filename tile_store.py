@@ -0,0 +1,232 @@
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# Verfügbare Codecs: Name -> (compress, decompress). zlib Stufe 1 ist immer vorhanden,
+# lz4 wird verwendet, wenn das Paket installiert ist.
+CODECS = {"zlib": (lambda raw: zlib.compress(raw, 1), zlib.decompress)}
+if lz4_frame is not None:
+    CODECS["lz4"] = (lz4_frame.compress, lz4_frame.decompress)
+
+DEFAULT_CODEC = "lz4" if "lz4" in CODECS else "zlib"
+
+
+def _shuffle(tile):
+    """Ordnet die Bytes nach Stelle (alle ersten Bytes, alle zweiten, ...) – komprimiert Höhenwerte deutlich besser."""
+    return np.ascontiguousarray(tile).view(np.uint8).reshape(-1, tile.itemsize).T.tobytes()
+
+
+def _unshuffle(raw, dtype, shape):
+    itemsize = np.dtype(dtype).itemsize
+    return np.frombuffer(raw, dtype=np.uint8).reshape(itemsize, -1).T.copy().view(dtype).reshape(shape)
+
+
+class CompressedTileStore:
+    """
+    DEM als Raster komprimierter Kacheln im Speicher. Entpackte Kacheln liegen in einem
+    begrenzten LRU-Cache; read_window() setzt beliebige Ausschnitte daraus zusammen.
+    Je Kachel wird zusätzlich das Maximum gespeichert, damit die Analyse entscheiden kann,
+    ob außerhalb eines Fensters überhaupt höhere Pixel liegen bzw. eine Flutung einen besseren
+    Sattel finden könnte, ohne die Kacheln zu entpacken.
+    """
+
+    def __init__(self, shape, dtype, tile_size=256, cache_tiles=64, codec=DEFAULT_CODEC, nodata=None):
+        if codec not in CODECS:
+            raise ValueError(f"Unbekannter Codec '{codec}', verfügbar: {', '.join(CODECS)}")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.tile_size = tile_size
+        self.cache_tiles = max(1, cache_tiles)
+        self.codec = codec
+        self.nodata = nodata
+        self.n_tiles_y = -(-self.shape[0] // tile_size)
+        self.n_tiles_x = -(-self.shape[1] // tile_size)
+        self.tile_max = np.full((self.n_tiles_y, self.n_tiles_x), -np.inf)      # ohne Nodata (Kandidaten)
+        self.tile_raw_max = np.full((self.n_tiles_y, self.n_tiles_x), -np.inf)  # mit Nodata (Flutung)
+        self.tile_raw_min = np.full((self.n_tiles_y, self.n_tiles_x), np.inf)   # mit Nodata (Minimum)
+        self._tiles = {}            # (ty, tx) -> komprimierte Bytes
+        self._cache = OrderedDict() # (ty, tx) -> entpacktes Array, zuletzt benutzt am Ende
+        self.reset_metrics()
+
+    # --- Aufbau ---
+
+    @classmethod
+    def from_array(cls, dem_data, **kwargs):
+        """Erzeugt den Speicher aus einem vorhandenen 2D-Array."""
+        store = cls(dem_data.shape, dem_data.dtype, **kwargs)
+        ts = store.tile_size
+        for ty in range(store.n_tiles_y):
+            for tx in range(store.n_tiles_x):
+                store._put_tile(ty, tx, dem_data[ty * ts:(ty + 1) * ts, tx * ts:(tx + 1) * ts])
+        return store
+
+    @classmethod
+    def from_file(cls, file_path, **kwargs):
+        """
+        Liest ein GeoTIFF streifenweise (eine Kachelzeile auf einmal) und komprimiert es,
+        ohne dass das gesamte Bild unkomprimiert im Speicher liegt.
+        """
+        with rasterio.open(file_path) as src:
+            kwargs.setdefault("nodata", src.nodata)
+            store = cls((src.height, src.width), src.dtypes[0], **kwargs)
+            ts = store.tile_size
+            for ty in range(store.n_tiles_y):
+                strip = src.read(1, window=Window(0, ty * ts, src.width, min(ts, src.height - ty * ts)))
+                for tx in range(store.n_tiles_x):
+                    store._put_tile(ty, tx, strip[:, tx * ts:(tx + 1) * ts])
+        return store
+
+    def _put_tile(self, ty, tx, tile):
+        compress = CODECS[self.codec][0]
+        self._tiles[(ty, tx)] = compress(_shuffle(tile))
+        self.tile_raw_max[ty, tx] = tile.max()
+        self.tile_raw_min[ty, tx] = tile.min()
+        valid = tile if self.nodata is None else tile[tile != self.nodata]
+        if valid.size:
+            self.tile_max[ty, tx] = valid.max()
+
+    # --- Zugriff ---
+
+    def _tile_shape(self, ty, tx):
+        ts = self.tile_size
+        return min(ts, self.shape[0] - ty * ts), min(ts, self.shape[1] - tx * ts)
+
+    def get_tile(self, ty, tx):
+        """Gibt eine entpackte Kachel zurück (nur lesen!), über den LRU-Cache."""
+        key = (ty, tx)
+        tile = self._cache.get(key)
+        if tile is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        start_time = time.perf_counter()
+        raw = CODECS[self.codec][1](self._tiles[key])
+        tile = _unshuffle(raw, self.dtype, self._tile_shape(ty, tx))
+        tile.flags.writeable = False
+        self.decompress_seconds += time.perf_counter() - start_time
+
+        self._cache[key] = tile
+        if len(self._cache) > self.cache_tiles:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return tile
+
+    def read_window(self, x0, y0, x1, y1):
+        """
+        Setzt den Ausschnitt [y0:y1, x0:x1] (x1, y1 exklusiv) aus den Kacheln zusammen.
+        Gibt ein neues, beschreibbares Array zurück.
+        """
+        rows, cols = self.shape
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(cols, x1), min(rows, y1)
+        out = np.empty((max(0, y1 - y0), max(0, x1 - x0)), dtype=self.dtype)
+        self.peak_window_pixels = max(self.peak_window_pixels, out.size)
+        ts = self.tile_size
+        for ty in range(y0 // ts, -(-y1 // ts)):
+            for tx in range(x0 // ts, -(-x1 // ts)):
+                tile = self.get_tile(ty, tx)
+                ty0, tx0 = ty * ts, tx * ts
+                sy0, sy1 = max(y0, ty0), min(y1, ty0 + tile.shape[0])
+                sx0, sx1 = max(x0, tx0), min(x1, tx0 + tile.shape[1])
+                out[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0] = tile[sy0 - ty0:sy1 - ty0, sx0 - tx0:sx1 - tx0]
+        return out
+
+    def __getitem__(self, key):
+        """Zugriff wie auf ein Array für einzelne Pixel [y, x] und Ausschnitte [y0:y1, x0:x1] (Schrittweite 1)."""
+        ys, xs = key
+        if np.isscalar(ys) and np.isscalar(xs):
+            ts = self.tile_size
+            return self.get_tile(ys // ts, xs // ts)[ys % ts, xs % ts]
+        if np.isscalar(ys):
+            ys = slice(ys, ys + 1)
+        if np.isscalar(xs):
+            xs = slice(xs, xs + 1)
+        y0, y1, _ = ys.indices(self.shape[0])
+        x0, x1, _ = xs.indices(self.shape[1])
+        return self.read_window(x0, y0, x1, y1)
+
+    def to_array(self):
+        """Entpackt das gesamte DEM."""
+        return self.read_window(0, 0, self.shape[1], self.shape[0])
+
+    def window_min(self, x0, y0, x1, y1):
+        """
+        Minimum (mit Nodata) des Ausschnitts [y0:y1, x0:x1]. Vollständig enthaltene Kacheln über
+        tile_raw_min, nur angeschnittene Kacheln werden entpackt.
+        """
+        ts = self.tile_size
+        result = np.inf
+        for ty in range(max(0, y0) // ts, -(-min(self.shape[0], y1) // ts)):
+            for tx in range(max(0, x0) // ts, -(-min(self.shape[1], x1) // ts)):
+                tile_h, tile_w = self._tile_shape(ty, tx)
+                if x0 <= tx * ts and y0 <= ty * ts and tx * ts + tile_w <= x1 and ty * ts + tile_h <= y1:
+                    result = min(result, self.tile_raw_min[ty, tx])
+                else:
+                    result = min(result, self.read_window(max(x0, tx * ts), max(y0, ty * ts),
+                                                          min(x1, tx * ts + tile_w), min(y1, ty * ts + tile_h)).min())
+        return result
+
+    def higher_tile_windows(self, value, inclusive=False):
+        """Rechtecke (x0, y0, x1, y1) aller Kacheln, deren Maximum über value (bzw. >= value) liegt."""
+        ts = self.tile_size
+        rows, cols = self.shape
+        mask = self.tile_max >= value if inclusive else self.tile_max > value
+        return [(tx * ts, ty * ts, min(cols, (tx + 1) * ts), min(rows, (ty + 1) * ts))
+                for ty, tx in np.argwhere(mask)]
+
+    # --- Metriken ---
+
+    def reset_metrics(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.decompress_seconds = 0.0
+        self.peak_window_pixels = 0  # größtes per read_window zusammengesetztes Fenster
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def compressed_bytes(self):
+        return sum(len(b) for b in self._tiles.values())
+
+    @property
+    def raw_bytes(self):
+        return self.shape[0] * self.shape[1] * self.dtype.itemsize
+
+    def metrics(self):
+        """Kennzahlen des Speichers und des Caches als Dictionary."""
+        return {
+            "codec": self.codec,
+            "tiles": len(self._tiles),
+            "raw_mb": self.raw_bytes / 1e6,
+            "compressed_mb": self.compressed_bytes / 1e6,
+            "ratio": self.raw_bytes / max(1, self.compressed_bytes),
+            "cached_tiles": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+            "decompress_seconds": self.decompress_seconds,
+            "peak_window_pixels": self.peak_window_pixels,
+            "peak_window_fraction": self.peak_window_pixels / (self.shape[0] * self.shape[1]),
+        }
+
+    def print_metrics(self):
+        m = self.metrics()
+        print(f"Kachelspeicher ({m['codec']}): {m['tiles']} Kacheln, {m['raw_mb']:.1f} MB → {m['compressed_mb']:.1f} MB "
+              f"(Faktor {m['ratio']:.1f}); Cache {m['cached_tiles']}/{self.cache_tiles}, Trefferquote {m['hit_rate']:.1%} "
+              f"({m['hits']} Treffer, {m['misses']} Entpackungen, {m['decompress_seconds'] * 1000:.1f} ms); "
+              f"größtes Fenster {m['peak_window_fraction']:.0%} des DEMs")